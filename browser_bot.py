@@ -2,24 +2,26 @@
 
 import argparse
 import asyncio
+import contextlib
+import functools
+import hashlib
 import json
 import os
+import re
 import shutil
 import subprocess
 import sys
-from datetime import datetime
+import textwrap
+import time
+import weakref
+from urllib.parse import urlsplit
 
 from logging_config import broser_console_logger, logger
 
 # テレメトリを無効化
 os.environ["ANONYMIZED_TELEMETRY"] = "false"
 
-import io
-
 import dotenv
-import httpx
-from browser_use import Agent, BrowserSession
-from PIL import Image
 from playwright._impl._errors import TimeoutError as PlaywrightTimeoutError
 from playwright._impl._fetch import APIResponse
 from playwright.async_api import async_playwright
@@ -29,6 +31,8 @@ dotenv.load_dotenv()
 
 # Chrome 接続先の設定 (デフォルト: http://localhost:9222)
 CHROME_DEBUG_URL = os.getenv("CHROME_DEBUG_URL", "http://localhost:9222")
+# デバッグポート (Chrome の起動や Lighthouse に渡す)
+CHROME_DEBUG_PORT = urlsplit(CHROME_DEBUG_URL).port or 9222
 
 # リモートブラウザ使用フラグ
 BROWSER_BOT_USE_REMOTE = os.getenv(
@@ -40,6 +44,74 @@ SELENIUM_REMOTE_URL = os.getenv(
     "SELENIUM_REMOTE_URL", "http://selenium-grid.cyberneura.com:31444"
 )
 
+# タスク実行に使う LLM のモデル名 (未指定なら OpenAI のデフォルトモデル)
+BROWSER_USE_LLM_MODEL = os.getenv("BROWSER_USE_LLM_MODEL", None)
+
+# run_task の最大ステップ数のデフォルト
+# (不正な値でサーバーが起動できなくならないよう、読めなければ 7 にする)
+try:
+    BROWSER_USE_MAX_STEPS = int(os.getenv("BROWSER_USE_MAX_STEPS", "7"))
+except ValueError:
+    logger.warning(
+        f"BROWSER_USE_MAX_STEPS={os.getenv('BROWSER_USE_MAX_STEPS')!r} は"
+        "整数ではないため、7 を使います"
+    )
+    BROWSER_USE_MAX_STEPS = 7
+
+# ソースコードやスクリーンショットの保存先ディレクトリ
+BROWSER_BOT_DOWNLOADS_DIR = os.path.expanduser(
+    os.getenv("BROWSER_BOT_DOWNLOADS_DIR", "~/Downloads")
+)
+
+# スクリーンショットの保存形式 ('png' または 'jpeg')
+BROWSER_BOT_SCREENSHOT_FORMAT = os.getenv(
+    "BROWSER_BOT_SCREENSHOT_FORMAT", "png"
+).lower()
+
+# タスクの操作履歴キャッシュの保存先 (未設定ならキャッシュしない)
+# 同じページで同じタスクを実行したとき、各ステップで LLM に判断させずに
+# 記録した操作を再生する (LLM は最後の結果のまとめに 1 回だけ使う)
+BROWSER_BOT_TASK_CACHE_DIR = os.getenv("BROWSER_BOT_TASK_CACHE_DIR", None)
+
+
+def get_event_loop_factory():
+    """
+    インストールされていれば、asyncio.run() の loop_factory に渡す
+    uvloop のイベントループ生成関数を返す
+    CDP の WebSocket や HTTP の待ち合わせが多いので、標準のループより速い
+    (Windows では uvloop が使えないので None を返し、標準のループを使う)
+
+    Returns:
+        Callable | None: イベントループの生成関数
+
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return None
+
+    return uvloop.new_event_loop
+
+
+def use_uvloop_if_available():
+    """
+    インストールされていれば、asyncio のイベントループに uvloop を使う
+    (Windows では uvloop が使えないので何もしない)
+
+    asyncio.run() を自分で呼ぶ場合は get_event_loop_factory() を使うこと。
+    イベントループポリシーは Python 3.14 で非推奨になったが、fastmcp の
+    server.run() は anyio.run() でループを作り、loop_factory を渡す口が
+    無いので、MCP サーバーではポリシーで切り替える。
+    """
+    loop_factory = get_event_loop_factory()
+    if loop_factory is None:
+        return
+
+    import uvloop
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.debug("イベントループに uvloop を使用します")
+
 
 class BrowserBotError(Exception):
     pass
@@ -57,15 +129,116 @@ class BrowserRuntimeError(BrowserBotError):
     """Chrome が起動していない場合に raise する例外"""
 
 
+# ページで実行する JavaScript。
+# ソース文字列を毎回同じにしておくと、V8 のコンパイルキャッシュが効くので
+# 呼び出しごとの再パースが起きない。値は引数で渡す。
+_NAVIGATE_SCRIPT = "(url) => { window.location.href = url; }"
+
+_PAGE_STATE_SCRIPT = """
+() => ({
+    title: document.title,
+    hasFocus: document.hasFocus(),
+    visibilityState: document.visibilityState
+})
+"""
+
+_FORCE_RELOAD_SCRIPT = """
+() => {
+    // location.reload(true) は deprecated だが、多くのブラウザでまだ動作する
+    if (typeof location.reload === 'function') {
+        try {
+            location.reload(true);
+        } catch (e) {
+            // 方法2: キャッシュバスティング用のタイムスタンプを追加
+            const url = new URL(window.location.href);
+            url.searchParams.set('_t', Date.now().toString());
+            window.location.href = url.toString();
+        }
+    }
+}
+"""
+
+# 指定のロード状態に達していればすぐ、そうでなければ達した時点で解決する
+# (load と networkidle は load イベントで代用する)
+_READY_STATE_SCRIPT = """
+(state) => new Promise((resolve) => {
+    const isLoad = state === 'load' || state === 'networkidle';
+    const reached = () => isLoad
+        ? document.readyState === 'complete'
+        : document.readyState !== 'loading';
+    if (reached()) {
+        resolve(document.readyState);
+        return;
+    }
+    window.addEventListener(
+        isLoad ? 'load' : 'DOMContentLoaded',
+        () => resolve(document.readyState),
+        { once: true }
+    );
+})
+"""
+
+
+async def _evaluate_on_actor_page(page, page_function: str, *args):
+    """
+    browser_use のページで JavaScript の関数を実行し、結果の値を返す
+
+    browser_use (actor) の Page.evaluate() は、評価する式を毎回 print で
+    標準出力に書き出す。MCP サーバーの stdio トランスポートでは標準出力が
+    プロトコルの通信路なので、page.evaluate() は使わずに
+    CDP の Runtime.evaluate を直接呼び出す。
+
+    Args:
+        page: browser_use のページオブジェクト
+        page_function: "(...args) => ..." 形式の JavaScript の関数
+        *args: 関数に渡す引数 (JSON にできる値)
+
+    Returns:
+        関数の戻り値 (Promise なら解決した値)
+
+    Raises:
+        BrowserRuntimeError: JavaScript の実行中に例外が発生した場合
+
+    """
+    arguments = ", ".join(json.dumps(arg) for arg in args)
+    session_id = await page.session_id
+    # SLF001: ページの CDP クライアントは公開されていないが、
+    # 同じセッションで評価するにはこれを使うしかない
+    result = await page._client.send.Runtime.evaluate(  # noqa: SLF001
+        {
+            "expression": f"({page_function})({arguments})",
+            "returnByValue": True,
+            "awaitPromise": True,
+        },
+        session_id=session_id,
+    )
+    if "exceptionDetails" in result:
+        raise BrowserRuntimeError(
+            f"JavaScript の実行に失敗しました: {result['exceptionDetails']}"
+        )
+    return result.get("result", {}).get("value")
+
+
 async def _navigate_to(page, url):
     """
     page.goto() の代わりに window.location.href で遷移する。
     page.goto() は CDP 経由で Chrome をクラッシュさせることがあるため。
+
+    Playwright のページでは、固定時間待つ代わりに遷移の開始 (commit) を
+    イベントで待つので、続くロード状態の待機が遷移前のページで
+    済んでしまうことがない。
     """
-    await page.evaluate(
-        f"() => {{ window.location.href = {json.dumps(url)}; }}"
-    )
-    await asyncio.sleep(0.5)
+    if not hasattr(page, "expect_navigation"):
+        # browser_use のページなど、遷移イベントを待てない場合
+        await _evaluate_on_actor_page(page, _NAVIGATE_SCRIPT, url)
+        await asyncio.sleep(0.5)
+        return
+
+    try:
+        async with page.expect_navigation(wait_until="commit", timeout=5000):
+            await page.evaluate(_NAVIGATE_SCRIPT, url)
+    except PlaywrightTimeoutError:
+        logger.warning(f"{url} への遷移開始を確認できませんでした")
 
 
 async def _page_wait_for_load_state(
@@ -83,6 +256,21 @@ async def _page_wait_for_load_state(
         str: 実際に使用されたロード状態
 
     """
+    if not hasattr(page, "wait_for_load_state"):
+        # browser_use のページなど、ロード状態を待てない場合は
+        # document.readyState を見る。ロード済みなら 1 回の評価で済む
+        try:
+            async with asyncio.timeout(timeout / 1000):
+                await _evaluate_on_actor_page(page, _READY_STATE_SCRIPT, state)
+            logger.debug(f"ロード状態 '{state}' で完了")
+            return state
+        except Exception as e:
+            logger.debug(
+                f"ロード状態 '{state}' の待機をスキップして続行: "
+                f"{e.__class__.__name__}: {e}"
+            )
+            return "skipped"
+
     try:
         await page.wait_for_load_state(state, timeout=timeout)
         logger.debug(f"ロード状態 '{state}' で完了")
@@ -108,12 +296,124 @@ async def _page_wait_for_load_state(
         return "skipped"
 
 
+@functools.cache
+def _ensure_downloads_dir():
+    """保存先ディレクトリを (プロセスで最初の 1 回だけ) 作成する"""
+    os.makedirs(BROWSER_BOT_DOWNLOADS_DIR, exist_ok=True)
+
+
+def _get_download_path(prefix: str, extension: str | None = None) -> str:
+    """
+    保存先ディレクトリに、タイムスタンプ付きのファイルパスを作る
+
+    Args:
+        prefix: ファイル名の接頭辞
+        extension: 拡張子。None の場合は拡張子なし
+
+    Returns:
+        str: ファイルのフルパス
+
+    """
+    _ensure_downloads_dir()
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    filename = f"{prefix}-{timestamp}"
+    if extension:
+        filename = f"{filename}.{extension}"
+    return os.path.join(BROWSER_BOT_DOWNLOADS_DIR, filename)
+
+
+async def _get_page_title(page):
+    """
+    ページタイトルを取得する。取得に失敗した場合は "Unknown" を返す
+
+    Args:
+        page: Playwright の Page オブジェクト
+
+    Returns:
+        str: ページタイトル
+
+    """
+    try:
+        return await page.title()
+    except Exception:
+        logger.warning("タイトル取得に失敗しました")
+        return "Unknown"
+
+
+# /json/version の確認に使う httpx クライアントの状態
+# (接続プールを呼び出し間で使い回すため、モジュールで保持する)
+_http_client_state = {"loop": None, "client": None}
+
+
+def _get_http_client():
+    """
+    Chrome の死活確認に使う httpx.AsyncClient を返す
+
+    呼び出しのたびにクライアントを作ると接続プールの作成と破棄が毎回発生するため、
+    1つのクライアントを使い回して keep-alive 接続を再利用する。
+    CLI では asyncio.run() ごとにイベントループが変わるので、
+    別のループで作ったクライアントは使わずに作り直す。
+
+    Returns:
+        httpx.AsyncClient: 共有クライアント
+
+    """
+    loop = asyncio.get_running_loop()
+    if _http_client_state["loop"] is not loop:
+        # httpx は読み込みが重いので、最初に使うときにだけインポートする
+        import httpx
+
+        _http_client_state["loop"] = loop
+        _http_client_state["client"] = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_keepalive_connections=1, keepalive_expiry=30
+            ),
+        )
+    return _http_client_state["client"]
+
+
+async def _close_http_client():
+    """共有 httpx クライアントを閉じる"""
+    client = _http_client_state["client"]
+    loop = _http_client_state["loop"]
+    _http_client_state["loop"] = None
+    _http_client_state["client"] = None
+    # 別のイベントループで作ったクライアントは閉じられないので捨てるだけにする
+    if client is not None and loop is asyncio.get_running_loop():
+        await client.aclose()
+
+
+async def shutdown():
+    """
+    モジュールで保持している共有リソースを解放する。
+    CLI などでイベントループを終了する前に呼び出す。
+    """
+    await _finish_browser_prewarm()
+    await _close_playwright()
+    await _close_http_client()
+
+
+def _chrome_not_running_error(error_msg):
+    """エラーをログに記録し、BrowserRuntimeError を作成する"""
+    logger.error(error_msg)
+    return BrowserRuntimeError(error_msg)
+
+
+# Chrome の起動確認に成功した結果を使い回す秒数
+# (短時間に続けて呼ばれたときに /json/version へ問い合わせ直さない)
+_CHROME_CHECK_CACHE_SECONDS = 5.0
+
+# 最後に Chrome の起動確認に成功した時刻 (time.monotonic())
+_chrome_check_state = {"succeeded_at": None}
+
+
 async def _check_chrome_running():
     """
     Chrome が起動しているかを確認する共通処理
+    直近に確認済みであれば問い合わせを省略する
 
-    Returns:
-        str | None: エラーメッセージ、または None（正常時）
+    Raises:
+        BrowserRuntimeError: Chrome に接続できない場合
 
     """
     if BROWSER_BOT_USE_REMOTE:
@@ -123,40 +423,41 @@ async def _check_chrome_running():
         )
         return
 
+    succeeded_at = _chrome_check_state["succeeded_at"]
+    if (
+        succeeded_at is not None
+        and time.monotonic() - succeeded_at < _CHROME_CHECK_CACHE_SECONDS
+    ):
+        return
+
+    not_running_msg = (
+        f"❌ エラー: Chrome が {CHROME_DEBUG_URL} で起動していません。"
+        "Chrome をデバッグポートで起動してから再度お試しください。"
+    )
+    # 例外クラスを参照するためにインポートする (読み込みは初回のみ)
+    import httpx
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{CHROME_DEBUG_URL}/json/version", timeout=5.0
-            )
-            if response.status_code != 200:
-                error_msg = (
-                    f"❌ エラー: Chrome が {CHROME_DEBUG_URL} で起動していません。"
-                    "Chrome をデバッグポートで起動してから再度お試しください。"
-                )
-                logger.error(error_msg)
-                raise BrowserRuntimeError(error_msg)
-    except httpx.ConnectError:
-        error_msg = (
-            f"❌ エラー: Chrome が {CHROME_DEBUG_URL} で起動していません。"
-            "Chrome をデバッグポートで起動してから再度お試しください。"
+        response = await _get_http_client().get(
+            f"{CHROME_DEBUG_URL}/json/version", timeout=5.0
         )
-        logger.error(error_msg)
-        raise BrowserRuntimeError(error_msg)
+    except httpx.ConnectError:
+        raise _chrome_not_running_error(not_running_msg)
     except httpx.TimeoutException:
-        error_msg = (
+        raise _chrome_not_running_error(
             "❌ エラー: Chrome への接続がタイムアウトしました。"
             "Chrome が正常に起動しているか確認してください。"
         )
-        logger.error(error_msg)
-        raise BrowserRuntimeError(error_msg)
     except Exception as e:
-        error_msg = (
+        raise _chrome_not_running_error(
             f"❌ エラー: Chrome の起動確認中に予期しないエラーが発生しました: "
             f"{e.__class__.__name__}: {e}"
         )
-        logger.error(error_msg)
-        raise BrowserRuntimeError(error_msg)
 
+    if response.status_code != 200:
+        raise _chrome_not_running_error(not_running_msg)
+
+    _chrome_check_state["succeeded_at"] = time.monotonic()
     logger.info(
         f"✅ Chrome が {CHROME_DEBUG_URL} で起動していることを確認しました。"
     )
@@ -191,32 +492,334 @@ async def _get_browser_connection(playwright_instance):
     )
 
 
-# LLM モデルを取得する関数
-def get_llm():
+# Playwright と CDP 接続済みブラウザの状態
+# (呼び出しのたびに Playwright の起動と CDP 接続をやり直さないよう、
+# モジュールで保持して使い回す)
+_playwright_state = {
+    "loop": None,
+    "lock": None,
+    "playwright": None,
+    "browser": None,
+}
+
+
+def _on_browser_disconnected(browser):
+    """ブラウザとの接続が切れたら、次回の呼び出しで再接続させる"""
+    if _playwright_state["browser"] is browser:
+        logger.info("ブラウザとの接続が切断されました")
+        _playwright_state["browser"] = None
+        # Chrome が終了した可能性があるので、次回は起動確認をやり直す
+        _chrome_check_state["succeeded_at"] = None
+        _active_page_state["page"] = None
+
+
+async def _get_browser():
+    """
+    接続済みのブラウザを返す。未接続なら Playwright を起動して接続する。
+
+    CLI では asyncio.run() ごとにイベントループが変わるので、
+    別のループで作った Playwright やブラウザは使わずに作り直す。
 
-    _llm_model_name = os.getenv("BROWSER_USE_LLM_MODEL", None)
-    if _llm_model_name:
-        if _llm_model_name.startswith("gemini"):
+    Returns:
+        Browser: 接続されたブラウザインスタンス
+
+    """
+    loop = asyncio.get_running_loop()
+    if _playwright_state["loop"] is not loop:
+        _playwright_state.update(
+            loop=loop, lock=asyncio.Lock(), playwright=None, browser=None
+        )
+
+    async with _playwright_state["lock"]:
+        browser = _playwright_state["browser"]
+        if browser is not None and browser.is_connected():
+            return browser
+
+        if _playwright_state["playwright"] is None:
+            _playwright_state["playwright"] = await async_playwright().start()
+
+        browser = await _get_browser_connection(
+            _playwright_state["playwright"]
+        )
+        browser.on("disconnected", _on_browser_disconnected)
+        _playwright_state["browser"] = browser
+        return browser
+
+
+def _is_browser_connected():
+    """
+    使い回している CDP 接続が生きているかを返す
+    接続が生きていれば Chrome は起動しているので、起動確認を省略できる
+
+    Returns:
+        bool: 現在のイベントループで接続済みのブラウザがあれば True
+
+    """
+    browser = _playwright_state["browser"]
+    return (
+        _playwright_state["loop"] is asyncio.get_running_loop()
+        and browser is not None
+        and browser.is_connected()
+    )
+
+
+async def _close_playwright():
+    """保持しているブラウザ接続を切断し、Playwright を終了する"""
+    loop = _playwright_state["loop"]
+    playwright = _playwright_state["playwright"]
+    browser = _playwright_state["browser"]
+    _playwright_state.update(
+        loop=None, lock=None, playwright=None, browser=None
+    )
+    # 別のイベントループで作ったものは操作できないので捨てるだけにする
+    if loop is not asyncio.get_running_loop():
+        return
+
+    # CDP 接続の場合、close() は接続を切るだけで Chrome 自体は終了しない
+    if browser is not None:
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"ブラウザ切断エラー: {e.__class__.__name__}: {e}")
+    if playwright is not None:
+        try:
+            await playwright.stop()
+        except Exception as e:
+            logger.debug(f"Playwright 終了エラー: {e.__class__.__name__}: {e}")
+
+
+@functools.lru_cache(maxsize=4)
+def _create_llm(model_name: str | None):
+    """
+    モデル名に対応する LLM クライアントを生成する
+    内部の HTTP コネクションプールを使い回せるよう、結果はキャッシュする
+
+    Args:
+        model_name: LLM のモデル名。None の場合は OpenAI のデフォルト
+
+    Returns:
+        LLM クライアント
+
+    """
+    if model_name:
+        if model_name.startswith("gemini"):
             # Google Gemini
             from langchain_google_genai import ChatGoogleGenerativeAI
 
-            return ChatGoogleGenerativeAI(
-                model=_llm_model_name, temperature=0.0
-            )
-        if _llm_model_name.startswith("claude"):
+            return ChatGoogleGenerativeAI(model=model_name, temperature=0.0)
+        if model_name.startswith("claude"):
             # Anthropic Claude (browser_use から直接インポート)
             from browser_use import ChatAnthropic
 
-            return ChatAnthropic(model=_llm_model_name, temperature=0.0)
+            return ChatAnthropic(model=model_name, temperature=0.0)
 
     # default: OpenAI
     from langchain_openai import ChatOpenAI
 
     return ChatOpenAI(
-        model=_llm_model_name or "gpt-5-mini",
+        model=model_name or "gpt-5-mini",
+    )
+
+
+# LLM モデルを取得する関数
+def get_llm():
+    return _create_llm(BROWSER_USE_LLM_MODEL)
+
+
+# タスクの操作履歴キャッシュの有効期限とディレクトリ全体の上限サイズ
+_TASK_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+_TASK_CACHE_MAX_BYTES = 100 * 1024 * 1024
+
+# キャッシュを再生するときの、ステップ間の待ち時間の上限 (秒)
+# (browser_use の既定は 2 秒、記録した間隔を使う場合は最大 5 秒)
+_TASK_CACHE_REPLAY_DELAY_SECONDS = 1.0
+
+# キャッシュファイル名 (<sha256>.json)。キャッシュディレクトリにある他の
+# ファイルを削除しないよう、この名前のものだけを期限切れの対象にする
+_TASK_CACHE_FILENAME_PATTERN = re.compile(r"[0-9a-f]{64}\.json")
+
+# DOM のフィンガープリント計算時に取り除く、アクセスごとに変わりやすい部分
+_DOM_NORMALIZE_PATTERNS = (
+    # スクリプトとスタイルの中身
+    re.compile(r"<(script|style)\b[^>]*>.*?</\1>", re.DOTALL | re.IGNORECASE),
+    # nonce や CSRF トークンなどの属性
+    re.compile(r'\s(?:nonce|integrity|value|data-[\w-]*token[\w-]*)="[^"]*"'),
+    # 数字を含む自動生成の id
+    re.compile(r'\sid="[^"]*\d[^"]*"'),
+    # 空白
+    re.compile(r"\s+"),
+)
+
+
+def _get_dom_fingerprint_source(html: str) -> str:
+    """
+    アクセスごとに変わる部分を取り除いて、DOM を比較できる形にする
+
+    Args:
+        html: ページの HTML
+
+    Returns:
+        str: 正規化した HTML
+
+    """
+    for pattern in _DOM_NORMALIZE_PATTERNS:
+        html = pattern.sub(" ", html)
+    return html
+
+
+async def _get_task_cache_path(page, *, task: str, url: str | None):
+    """
+    タスク、開始 URL、ページの DOM から操作履歴キャッシュのパスを決める
+
+    Args:
+        page: browser_use のページオブジェクト
+        task: 実行するタスクの説明
+        url: 最初に開く URL
+
+    Returns:
+        str | None: キャッシュファイルのパス。キャッシュが無効か、
+            DOM を取得できなかった場合は None
+
+    """
+    if not BROWSER_BOT_TASK_CACHE_DIR:
+        return None
+
+    try:
+        html = await _evaluate_on_actor_page(
+            page, "() => document.documentElement.outerHTML"
+        )
+    except Exception as e:
+        logger.warning(
+            f"タスクキャッシュ用の DOM 取得に失敗: {e.__class__.__name__}: {e}"
+        )
+        return None
+
+    fingerprint = hashlib.sha256(
+        "\0".join((_get_dom_fingerprint_source(html), task, url or "")).encode(
+            "utf-8"
+        )
+    ).hexdigest()
+    return os.path.join(
+        os.path.expanduser(BROWSER_BOT_TASK_CACHE_DIR), f"{fingerprint}.json"
     )
 
 
+def _is_task_cache_fresh(cache_path) -> bool:
+    """キャッシュファイルが存在し、有効期限内かを返す"""
+    try:
+        age = time.time() - os.stat(cache_path).st_mtime
+    except FileNotFoundError:
+        return False
+    return age < _TASK_CACHE_TTL_SECONDS
+
+
+def _save_task_cache(history, cache_path):
+    """
+    エージェントの操作履歴をキャッシュに保存し、上限を超えた古いものを削除する
+
+    Args:
+        history: エージェントの実行結果 (AgentHistoryList)
+        cache_path: キャッシュファイルのパス
+
+    """
+    # 書きかけのファイルを読まれないよう、一時ファイルに書いてから置き換える
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        history.save_to_file(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+    # 最後に使ったもの (保存または再生に成功した時刻) が古いものから、
+    # 合計サイズが上限に収まるまで削除する
+    cache_dir = os.path.dirname(cache_path)
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not _TASK_CACHE_FILENAME_PATTERN.fullmatch(name):
+            continue
+        entry = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(entry)
+        except FileNotFoundError:
+            # 他のプロセスが同時に削除した
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    entries.sort()
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry in entries:
+        if total_size <= _TASK_CACHE_MAX_BYTES:
+            break
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(entry)
+        total_size -= size
+
+
+async def _replay_task_cache(agent, cache_path, *, timeout_seconds: int):
+    """
+    キャッシュした操作履歴を、各ステップで LLM に判断させずに再生する
+    (browser_use は再生の最後に、結果のまとめをエージェントの LLM に
+    スクリーンショット付きで 1 回問い合わせる)
+
+    Args:
+        agent: 再生に使う Agent
+        cache_path: キャッシュファイルのパス
+        timeout_seconds: タイムアウト秒数
+
+    Returns:
+        str | None: 再生結果のテキスト (最後の結果の extracted_content)。
+            失敗した場合は None
+
+    """
+    logger.info(f"キャッシュ済みの操作を再生: {cache_path}")
+    try:
+        async with asyncio.timeout(timeout_seconds):
+            # 記録されたステップ間隔は元の実行の LLM 待ち時間を含むので、
+            # 再生では短く切り詰める
+            results = await agent.load_and_rerun(
+                cache_path,
+                skip_failures=False,
+                delay_between_actions=_TASK_CACHE_REPLAY_DELAY_SECONDS,
+                max_step_interval=_TASK_CACHE_REPLAY_DELAY_SECONDS,
+            )
+        # 使われたキャッシュが古いものとして削除されないよう、
+        # 最終更新時刻を更新する (有効期限もここから数え直す)
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(cache_path)
+        return results[-1].extracted_content or ""
+    except Exception as e:
+        # ページが変わっているなどで再生できなければ、キャッシュを捨てる
+        logger.warning(
+            f"キャッシュの再生に失敗したため、エージェントで実行します: "
+            f"{e.__class__.__name__}: {e}"
+        )
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(cache_path)
+        return None
+
+
+async def _restart_from_url(browser_session, url: str):
+    """
+    キャッシュの再生に失敗したとき、タスク開始時の URL を開き直す
+
+    Args:
+        browser_session: browser_use の BrowserSession
+        url: タスク開始時の URL
+
+    """
+    logger.info(f"タスク開始時の URL を開き直します: {url}")
+    try:
+        page = await browser_session.get_current_page()
+        await _navigate_to(page, url)
+        await _page_wait_for_load_state(page)
+    except Exception as e:
+        # 開き直せなくても、エージェントが現在のページから続ける
+        logger.warning(
+            f"開始時の URL を開き直せませんでした: {e.__class__.__name__}: {e}"
+        )
+
+
 async def run_task(
     *, task: str, max_steps: int | None = None, url: str | None = None
 ):
@@ -228,6 +831,11 @@ async def run_task(
         max_steps: 最大ステップ数
         url: 最初に開く URL（指定された場合）
 
+    Returns:
+        str: エージェントの最終結果のテキスト。最後まで実行できなかった
+            場合は実行履歴を文字列にしたもの。キャッシュを再生した場合も
+            同じく最終結果のテキストを返す
+
     """
     logger.info(f"タスク開始: {task}")
 
@@ -235,11 +843,26 @@ async def run_task(
         logger.info(f"指定 URL: {url}")
 
     if max_steps is None:
-        # 環境変数から max_steps を取得
-        max_steps = int(os.getenv("BROWSER_USE_MAX_STEPS", "7"))
+        # 環境変数で指定された max_steps を使う
+        max_steps = BROWSER_USE_MAX_STEPS
 
     logger.debug(f"{max_steps=}")
 
+    # 1 ステップも実行できないなら、browser_use の読み込みや
+    # ブラウザへの接続をする前に打ち切る
+    if max_steps <= 0:
+        error_msg = (
+            f"❌ エラー: max_steps は 1 以上を指定してください: {max_steps}"
+        )
+        logger.error(error_msg)
+        raise BrowserBotTaskAbortedError(error_msg)
+
+    # エージェントはタブを切り替えるので、直前に特定したページを使わせない
+    _active_page_state["page"] = None
+
+    # browser_use は読み込みが重いので、タスク実行時にだけインポートする
+    from browser_use import Agent, BrowserSession
+
     logger.debug(f"{BROWSER_BOT_USE_REMOTE=}")
     # リモートブラウザかローカルブラウザかによって処理を分岐
     if BROWSER_BOT_USE_REMOTE:
@@ -252,7 +875,9 @@ async def run_task(
         browser_session = BrowserSession(cdp_url=cdp_url)
     else:
         # Chrome が起動しているか確認
-        await _check_chrome_running()
+        # (CDP 接続が生きていれば起動済みなので確認しない)
+        if not _is_browser_connected():
+            await _check_chrome_running()
 
         # 既存のローカル Chrome に接続
         browser_session = BrowserSession(cdp_url=CHROME_DEBUG_URL)
@@ -264,7 +889,6 @@ async def run_task(
     try:
         page = await browser_session.get_current_page()
         _setup_page_logging(page)
-        await page.wait_for_load_state("networkidle")
     except Exception as e:
         error_msg = f"❌ エラー: エージェント実行中にエラーが発生しました: {e.__class__.__name__}: {e}"
         logger.error(error_msg, exc_info=True)
@@ -299,16 +923,61 @@ async def run_task(
     )
 
     timeout_seconds = max_steps * 6
+    # キャッシュの再生に失敗してエージェントで実行し直す場合も、
+    # 全体でこの時間に収める
+    deadline = asyncio.get_running_loop().time() + timeout_seconds
 
-    try:
-        # 1分（60秒）のタイムアウトを設定
-        result = await asyncio.wait_for(
-            agent.run(max_steps=max_steps), timeout=timeout_seconds
+    # 同じページで同じタスクを実行済みなら、記録した操作を再生する
+    cache_path = None
+    if BROWSER_BOT_TASK_CACHE_DIR:
+        page = await browser_session.get_current_page()
+        cache_path = await _get_task_cache_path(page, task=task, url=url)
+    if cache_path is not None and _is_task_cache_fresh(cache_path):
+        start_url = url or await page.get_url()
+        result = await _replay_task_cache(
+            agent, cache_path, timeout_seconds=timeout_seconds
         )
+        if result is not None:
+            return result
+        # 再生に使った Agent を閉じる。browser_session も切断されるので
+        # 接続し直す
+        try:
+            await agent.close()
+            await browser_session.start()
+        except Exception as e:
+            logger.warning(
+                f"再生に使った Agent の終了に失敗: {e.__class__.__name__}: {e}"
+            )
+        # 途中まで再生した操作でページが変わっているので、
+        # 開始時の URL を開き直してからエージェントに任せる
+        await _restart_from_url(browser_session, start_url)
+        agent = Agent(
+            task=task,
+            llm=llm_model,
+            browser_session=browser_session,
+        )
+
+    try:
+        # max_steps に応じたタイムアウトを設定
+        # (asyncio.timeout_at は wait_for と違い、別タスクで包まずに待てる)
+        async with asyncio.timeout_at(deadline):
+            result = await agent.run(max_steps=max_steps)
+        # 最初の200文字のみログに記録
         logger.info(
-            f"タスク完了 (max_steps={max_steps}): {str(result)[:200]}..."
-        )  # 最初の200文字のみログに記録
-        return result
+            "タスク完了 (max_steps=%d): %s...",
+            max_steps,
+            str(result)[:200],
+        )
+        if cache_path is not None and result.is_successful():
+            try:
+                await asyncio.to_thread(_save_task_cache, result, cache_path)
+            except Exception as e:
+                logger.warning(
+                    f"タスクキャッシュの保存に失敗: {e.__class__.__name__}: {e}"
+                )
+        # キャッシュを再生した場合と同じく、最終結果のテキストを返す
+        final_result = result.final_result()
+        return final_result if final_result is not None else str(result)
     except TimeoutError:
         error_msg = f"❌ エラー: エージェント実行が{timeout_seconds}秒でタイムアウトしました"
         logger.error(error_msg)
@@ -319,18 +988,37 @@ async def run_task(
         raise BrowserBotTaskFailedError(error_msg)
 
 
+# ページを最後に操作対象にした時刻 (time.monotonic())
+# アクティブページの判定で、フォーカスや表示状態が同じページの優先順位に使う
+_page_last_used = weakref.WeakKeyDictionary()
+
+# 直前に全タブへ問い合わせて特定したページと、その時刻 (time.monotonic())
+# スクリプトの実行が続けて呼ばれたときは、問い合わせを省略してこのページを使う
+# (有効期限は問い合わせた時刻から数え、キャッシュを使っても延長しない)
+_ACTIVE_PAGE_CACHE_SECONDS = 5.0
+_active_page_state = {"page": None, "probed_at": 0.0}
+
+# アクティブページの候補にしない、DevTools や特殊なプロトコルのページ
+_SPECIAL_PAGE_URL_PREFIXES = (
+    "devtools://",
+    "chrome://",
+    "chrome-extension://",
+    "moz-extension://",
+)
+
+
 async def _get_active_page(
-    playwright_instance,
     *,
     url: str | None = None,
     create_new_page: bool = True,
+    use_cache: bool = False,
 ):
     """
     Chrome のアクティブなページを取得する共通処理
 
     Args:
-        playwright_instance: Playwright のインスタンス
         url: 指定されたら遷移する
+        use_cache: 直前に特定したページを、問い合わせずに使ってよいか
 
     Returns:
         tuple: (page, browser) または (None, None)
@@ -340,61 +1028,15 @@ async def _get_active_page(
         url = None
 
     # ブラウザに接続
-    browser = await _get_browser_connection(playwright_instance)
+    browser = await _get_browser()
 
     try:
-        # 既存のコンテキストを取得
-        contexts = browser.contexts
-        if not contexts:
-            error_msg = (
-                "❌ エラー: Chrome にアクティブなコンテキストがありません"
+        active_page = _get_cached_active_page(browser) if use_cache else None
+        if active_page is None:
+            active_page = await _find_active_page(
+                browser, create_new_page=create_new_page
             )
-            logger.error(error_msg)
-            raise BrowserRuntimeError(error_msg)
-
-        # 全コンテキストからページを収集
-        all_pages = []
-        for context in contexts:
-            for page in context.pages:
-                # ページが閉じられていないかチェック
-                if not page.is_closed():
-                    # DevTools や特殊なプロトコルのページをスキップ
-                    page_url = page.url
-                    if page_url.startswith(
-                        (
-                            "devtools://",
-                            "chrome://",
-                            "chrome-extension://",
-                            "moz-extension://",
-                        )
-                    ):
-                        logger.debug(
-                            f"特殊プロトコルページをスキップ: {page_url}"
-                        )
-                        continue
-                    all_pages.append(page)
-
-        if all_pages:
-            # 最も最近アクティブになったページを特定
-            active_page = await _find_most_recent_active_page(all_pages)
-
-            if not active_page:
-                # フォールバック: 最初の有効なページを使用
-                active_page = all_pages[0]
-                logger.info(
-                    "最新のアクティブページが特定できないため、最初のページを使用します"
-                )
-
-        # ページが取得できなかった
-        elif create_new_page:
-            # 無かった場合に作る設定になっている
-            # 新しいページを作成
-            active_page = await browser.new_page()
-            all_pages = [active_page]
-        else:
-            error_msg = "❌ エラー: Chrome にアクティブなページがありません"
-            logger.error(error_msg)
-            raise BrowserRuntimeError(error_msg)
+            _active_page_state["probed_at"] = time.monotonic()
 
         logger.info(f"アクティブページを特定: {active_page.url}")
 
@@ -408,14 +1050,133 @@ async def _get_active_page(
         # ページログ転送を設定
         _setup_page_logging(active_page)
 
+        _page_last_used[active_page] = time.monotonic()
+        _active_page_state["page"] = active_page
         return active_page, browser
 
     except Exception as e:
+        _active_page_state["page"] = None
         error_msg = f"❌ エラー: アクティブページの取得中にエラーが発生しました: {e.__class__.__name__}: {e}"
         logger.error(error_msg, exc_info=True)
         raise BrowserRuntimeError(error_msg)
 
 
+def _get_cached_active_page(browser):
+    """
+    直前に操作対象にしたページが使えれば返す
+
+    Args:
+        browser: 接続中のブラウザ
+
+    Returns:
+        Page | None: 直近 _ACTIVE_PAGE_CACHE_SECONDS 秒以内に特定したページ。
+            無い場合や、閉じられた・別のブラウザのページの場合は None
+
+    """
+    page = _active_page_state["page"]
+    if (
+        page is None
+        or page.is_closed()
+        or page.context.browser is not browser
+        or page.url.startswith(_SPECIAL_PAGE_URL_PREFIXES)
+    ):
+        return None
+
+    if (
+        time.monotonic() - _active_page_state["probed_at"]
+        >= _ACTIVE_PAGE_CACHE_SECONDS
+    ):
+        return None
+    return page
+
+
+async def _find_active_page(browser, *, create_new_page: bool):
+    """
+    全コンテキストのページから、アクティブなページを探す
+
+    Args:
+        browser: 接続中のブラウザ
+        create_new_page: ページが無い場合に新しく作るかどうか
+
+    Returns:
+        Page: アクティブなページ
+
+    """
+    # 既存のコンテキストを取得
+    contexts = browser.contexts
+    if not contexts:
+        error_msg = "❌ エラー: Chrome にアクティブなコンテキストがありません"
+        logger.error(error_msg)
+        raise BrowserRuntimeError(error_msg)
+
+    # 全コンテキストからページを収集
+    # 閉じられたページと、DevTools や特殊なプロトコルのページを除く
+    all_pages = [
+        page
+        for context in contexts
+        for page in context.pages
+        if not page.is_closed()
+        and not page.url.startswith(_SPECIAL_PAGE_URL_PREFIXES)
+    ]
+
+    if all_pages:
+        # 最も最近アクティブになったページを特定
+        active_page = await _find_most_recent_active_page(all_pages)
+
+        if not active_page:
+            # フォールバック: 最初の有効なページを使用
+            active_page = all_pages[0]
+            logger.info(
+                "最新のアクティブページが特定できないため、最初のページを使用します"
+            )
+
+    # ページが取得できなかった
+    elif create_new_page:
+        # 無かった場合に作る設定になっている
+        # 新しいページを作成
+        active_page = await browser.new_page()
+    else:
+        error_msg = "❌ エラー: Chrome にアクティブなページがありません"
+        logger.error(error_msg)
+        raise BrowserRuntimeError(error_msg)
+
+    return active_page
+
+
+async def _collect_page_info(page):
+    """
+    アクティブページ判定に使うページの情報を取得する
+
+    Args:
+        page: Playwright の Page オブジェクト (閉じられていない通常のページ)
+
+    Returns:
+        dict | None: ページ情報。取得に失敗した場合は None
+
+    """
+    try:
+        # ページの基本情報を取得
+        url = page.url
+
+        # タイトルとフォーカス・表示状態を 1 回の JavaScript 実行でまとめて取得
+        page_state = await page.evaluate(_PAGE_STATE_SCRIPT)
+
+        return {
+            "page": page,
+            "url": url,
+            "title": page_state.get("title", "Unknown"),
+            "has_focus": page_state.get("hasFocus", False),
+            "visibility_state": page_state.get("visibilityState", "hidden"),
+            # JavaScript の Date.now() は評価した時刻でしかないので、
+            # このプロセスで最後に操作対象にした時刻を使う
+            "timestamp": _page_last_used.get(page, 0.0),
+        }
+
+    except Exception as e:
+        logger.debug(f"ページ情報取得エラー: {e.__class__.__name__}: {e}")
+        return None
+
+
 async def _find_most_recent_active_page(pages):
     """
     複数のページから最も最近アクティブになったページを特定する
@@ -427,66 +1188,17 @@ async def _find_most_recent_active_page(pages):
         page: 最もアクティブなページ、または None
 
     """
-    try:
-        # ページの情報を収集
-        page_info = []
-        for page in pages:
-            try:
-                if page.is_closed():
-                    continue
-
-                # ページの基本情報を取得
-                url = page.url
-
-                # DevTools や特殊なプロトコルのページをスキップ
-                if url.startswith(
-                    (
-                        "devtools://",
-                        "chrome://",
-                        "chrome-extension://",
-                        "moz-extension://",
-                    )
-                ):
-                    logger.debug(f"特殊プロトコルページをスキップ: {url}")
-                    continue
-
-                title = (
-                    await page.title() if not page.is_closed() else "Unknown"
-                )
+    # 候補が 1 ページだけなら、比べるまでもない
+    if len(pages) == 1:
+        return pages[0]
 
-                # ページに JavaScript を実行して最終アクセス時刻を取得
-                last_activity = await page.evaluate(
-                    """
-                    () => {
-                        // document.lastModified または現在時刻を使用
-                        return {
-                            lastModified: document.lastModified,
-                            timestamp: Date.now(),
-                            hasFocus: document.hasFocus(),
-                            visibilityState: document.visibilityState
-                        };
-                    }
-                """
-                )
-
-                page_info.append(
-                    {
-                        "page": page,
-                        "url": url,
-                        "title": title,
-                        "has_focus": last_activity.get("hasFocus", False),
-                        "visibility_state": last_activity.get(
-                            "visibilityState", "hidden"
-                        ),
-                        "timestamp": last_activity.get("timestamp", 0),
-                    }
-                )
-
-            except Exception as e:
-                logger.debug(
-                    f"ページ情報取得エラー: {e.__class__.__name__}: {e}"
-                )
-                continue
+    try:
+        # ページの情報を並行して収集
+        # (ページごとの CDP 往復を順番に待たないようにする)
+        results = await asyncio.gather(
+            *(_collect_page_info(page) for page in pages)
+        )
+        page_info = [info for info in results if info is not None]
 
         if not page_info:
             return None
@@ -494,7 +1206,7 @@ async def _find_most_recent_active_page(pages):
         # 優先順位でソート
         # 1. フォーカスがあるページ
         # 2. visible 状態のページ
-        # 3. タイムスタンプが新しいページ
+        # 3. 最後に操作対象にしたのが新しいページ
         page_info.sort(
             key=lambda x: (
                 x["has_focus"],
@@ -523,6 +1235,11 @@ async def _find_most_recent_active_page(pages):
         return None
 
 
+# ログ転送を設定済みのページ
+# (ブラウザ接続を使い回すため、同じページに何度もリスナーを登録しないようにする)
+_logging_pages = weakref.WeakSet()
+
+
 def _setup_page_logging(page):
     """
     ページにコンソールログとエラーログの転送を設定する
@@ -531,6 +1248,9 @@ def _setup_page_logging(page):
         page: Playwright page オブジェクト
 
     """
+    if page in _logging_pages:
+        return
+
     try:
         # コンソールメッセージのリスナーを設定
         page.on(
@@ -546,6 +1266,7 @@ def _setup_page_logging(page):
             lambda error: broser_console_logger.error(f"[PAGE ERROR] {error}"),
         )
 
+        _logging_pages.add(page)
         logger.debug(f"ページログ転送を設定: {page.url}")
     except Exception as e:
         logger.warning(
@@ -553,47 +1274,21 @@ def _setup_page_logging(page):
         )
 
 
-def _resize_image_if_needed(
-    image_bytes: bytes, max_size_bytes: int = 700000
-) -> bytes:
-    """
-    画像サイズが制限を超える場合は縮小する
-    Base64 エンコード後のサイズを考慮（約1.33倍）
-
-    Args:
-        image_bytes: 元の画像データ
-        max_size_bytes: 最大サイズ（Base64 前）
-
-    Returns:
-        bytes: リサイズされた画像データ
-
-    """
-    # Base64 エンコード後のサイズを推定
-    estimated_base64_size = len(image_bytes) * 1.33
-
-    if estimated_base64_size <= max_size_bytes:
-        return image_bytes
-
-    # PIL で画像を開く
-    img = Image.open(io.BytesIO(image_bytes))
-
-    # 縮小率を計算
-    scale_factor = (max_size_bytes / estimated_base64_size) ** 0.5
-    new_width = int(img.width * scale_factor)
-    new_height = int(img.height * scale_factor)
-
-    logger.info(
-        f"画像をリサイズ: {img.width}x{img.height} → {new_width}x{new_height}"
+# 保存形式ごとの page.screenshot() のオプションとファイルの拡張子
+# (JPEG はブラウザ側でのエンコードが速く、ファイルも大幅に小さくなる)
+_SCREENSHOT_FORMATS = {
+    "png": ({"type": "png"}, "png"),
+    "jpeg": ({"type": "jpeg", "quality": 85}, "jpg"),
+    "jpg": ({"type": "jpeg", "quality": 85}, "jpg"),
+}
+if BROWSER_BOT_SCREENSHOT_FORMAT not in _SCREENSHOT_FORMATS:
+    logger.warning(
+        f"BROWSER_BOT_SCREENSHOT_FORMAT={BROWSER_BOT_SCREENSHOT_FORMAT} は"
+        "未対応のため、PNG で保存します"
     )
-
-    # リサイズ
-    img_resized = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-    # バイトに変換
-    output = io.BytesIO()
-    img_resized.save(output, format="PNG", optimize=True)
-    return output.getvalue()
-
+_SCREENSHOT_OPTIONS, _SCREENSHOT_EXTENSION = _SCREENSHOT_FORMATS.get(
+    BROWSER_BOT_SCREENSHOT_FORMAT, _SCREENSHOT_FORMATS["png"]
+)
 
 # _format_ax_node で使用する定数
 _AX_SKIP_ROLES = frozenset(
@@ -724,50 +1419,45 @@ async def get_accessibility_snapshot(*, url: str | None = None):
     """
     logger.info("A11y スナップショット取得開始")
 
-    async with async_playwright() as p:
-        page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url)
 
-        try:
-            current_url = page.url
-            await _page_wait_for_load_state(page)
+    current_url = page.url
+    # URL 指定時は _get_active_page で待機済み
+    if not url:
+        await _page_wait_for_load_state(page)
 
-            try:
-                title = await page.title()
-            except Exception:
-                title = "Unknown"
-
-            # A11y tree を取得
-            ax_tree = await page.accessibility.snapshot(interesting_only=True)
-
-            if not ax_tree:
-                logger.warning("A11y tree が空です")
-                return {
-                    "snapshot_text": "(empty page)",
-                    "url": current_url,
-                    "title": title,
-                    "ref_map": {},
-                }
-
-            # ツリーをテキスト形式に変換
-            ref_map = {}
-            counter = [1]  # リストで参照渡し
-            lines = _format_ax_node(ax_tree, ref_map, counter)
-            snapshot_text = "\n".join(lines)
+    # タイトルと A11y tree を並行して取得
+    title, ax_tree = await asyncio.gather(
+        _get_page_title(page),
+        page.accessibility.snapshot(interesting_only=True),
+    )
 
-            logger.info(
-                f"A11y スナップショット取得完了: {current_url}, "
-                f"ref数={len(ref_map)}, 行数={len(lines)}"
-            )
+    if not ax_tree:
+        logger.warning("A11y tree が空です")
+        return {
+            "snapshot_text": "(empty page)",
+            "url": current_url,
+            "title": title,
+            "ref_map": {},
+        }
 
-            return {
-                "snapshot_text": snapshot_text,
-                "url": current_url,
-                "title": title,
-                "ref_map": ref_map,
-            }
+    # ツリーをテキスト形式に変換
+    ref_map = {}
+    counter = [1]  # リストで参照渡し
+    lines = _format_ax_node(ax_tree, ref_map, counter)
+    snapshot_text = "\n".join(lines)
 
-        finally:
-            await browser.close()
+    logger.info(
+        f"A11y スナップショット取得完了: {current_url}, "
+        f"ref数={len(ref_map)}, 行数={len(lines)}"
+    )
+
+    return {
+        "snapshot_text": snapshot_text,
+        "url": current_url,
+        "title": title,
+        "ref_map": ref_map,
+    }
 
 
 async def get_page_source(*, url: str | None = None):
@@ -787,32 +1477,44 @@ async def get_page_source(*, url: str | None = None):
     """
     logger.info("ソースコード取得開始")
 
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url)
 
     # 現在の状態を取得
     current_url = page.url
 
     # ページが完全に読み込まれるまで待機
-    await _page_wait_for_load_state(page)
-
-    # タイトルとソースコードを取得
-    try:
-        title = await page.title()
-    except Exception:
-        title = "Unknown"
-        logger.warning("タイトル取得に失敗しました")
+    # (URL 指定時は _get_active_page で待機済み)
+    if not url:
+        await _page_wait_for_load_state(page)
 
-    source = await page.content()
+    # タイトルとソースコードを 1 回の JavaScript 実行でまとめて取得
+    # (page.content() と同じく DOCTYPE も含める)
+    page_data = await page.evaluate(
+        """
+        () => {
+            let source = "";
+            if (document.doctype) {
+                source = new XMLSerializer().serializeToString(
+                    document.doctype
+                );
+            }
+            if (document.documentElement) {
+                source += document.documentElement.outerHTML;
+            }
+            return {title: document.title, source};
+        }
+        """
+    )
+    title = page_data["title"]
+    source = page_data["source"]
 
     # ファイルに保存
-    downloads_dir = os.path.expanduser("~/Downloads")
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"browser-bot-source-{timestamp}.html"
-    file_path = os.path.join(downloads_dir, filename)
+    file_path = _get_download_path("browser-bot-source", "html")
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(source)
+    # 数 MB になることもあるので、書き込みはイベントループの外で行う
+    file_path = await asyncio.to_thread(
+        _write_new_file, file_path, source.encode("utf-8")
+    )
 
     logger.info(
         f"ソースコード取得完了: {current_url}, ファイル保存: {file_path}"
@@ -842,7 +1544,8 @@ async def get_visible_screenshot(
             'file_path': str,     # 保存したファイルのフルパス
             'url': str,           # 現在のURL
             'title': str          # ページタイトル
-            'screenshot': bytes,  # 画像バイナリ (include_image_binary=True の場合のみ)
+            'screenshot': bytes,  # 保存したファイルと同じ形式の画像バイナリ
+            #   (include_image_binary=True の場合のみ)
         }
 
     """
@@ -851,53 +1554,63 @@ async def get_visible_screenshot(
         f"(スクロール倍率: {page_y_offset_as_viewport_height})"
     )
 
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url)
 
     # 現在の状態を取得
     current_url = page.url
 
     # ページが完全に読み込まれるまで待機
-    await _page_wait_for_load_state(page)
+    # (URL 指定時は _get_active_page で待機済み)
+    if not url:
+        await _page_wait_for_load_state(page)
 
-    # タイトルを取得
-    try:
-        title = await page.title()
-    except Exception:
-        title = "Unknown"
-        logger.warning("タイトル取得に失敗しました")
+    # タイトルの取得、スクロール、スクロール後の描画待ちを
+    # 1 回の JavaScript 実行でまとめて行う
+    # (固定時間待つ代わりに、次の描画フレームまで待つ。
+    # 非表示のタブでは requestAnimationFrame が呼ばれないので 500ms で諦める)
+    page_state = await page.evaluate(
+        """
+        async (ratio) => {
+            const viewportHeight = window.innerHeight;
+            const scrollY = Math.trunc(viewportHeight * ratio);
+            if (scrollY > 0) {
+                window.scrollBy(0, scrollY);
+                await Promise.race([
+                    new Promise(
+                        (resolve) => requestAnimationFrame(
+                            () => requestAnimationFrame(resolve)
+                        )
+                    ),
+                    new Promise((resolve) => setTimeout(resolve, 500)),
+                ]);
+            }
+            return {title: document.title, viewportHeight, scrollY};
+        }
+        """,
+        page_y_offset_as_viewport_height,
+    )
+    title = page_state["title"]
 
     # スクロール処理
     if page_y_offset_as_viewport_height > 0:
-        # ビューポートの高さを取得
-        viewport_height = await page.evaluate("() => window.innerHeight")
-        # スクロール量を計算
-        scroll_y = int(viewport_height * page_y_offset_as_viewport_height)
-        # スクロール実行
-        await page.evaluate(f"() => window.scrollBy(0, {scroll_y})")
-        # スクロール後の描画を待つ
-        await page.wait_for_timeout(500)
+        viewport_height = page_state["viewportHeight"]
+        scroll_y = page_state["scrollY"]
         logger.info(
             f"ページをスクロールしました: {scroll_y}px "
             f"(ビューポート高さ {viewport_height}px の "
             f"{page_y_offset_as_viewport_height} 倍)"
         )
 
-    # 表示箇所のスクリーンショット取得
-    screenshot_bytes = await page.screenshot()
-
-    # サイズ調整
-    # やっぱりリサイズしない
-    # screenshot_bytes = _resize_image_if_needed(screenshot_bytes)
-
-    # ファイルに保存
-    downloads_dir = os.path.expanduser("~/Downloads")
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"browser-bot-screenshot-{timestamp}.png"
-    file_path = os.path.join(downloads_dir, filename)
+    # 保存先のファイルパス
+    file_path = _get_download_path(
+        "browser-bot-screenshot", _SCREENSHOT_EXTENSION
+    )
 
-    with open(file_path, "wb") as f:
-        f.write(screenshot_bytes)
+    # 表示箇所のスクリーンショット取得
+    # (path を渡すと、ファイル書き込みはイベントループの外で行われる)
+    screenshot_bytes = await page.screenshot(
+        path=file_path, **_SCREENSHOT_OPTIONS
+    )
 
     logger.info(
         f"表示箇所のスクリーンショット取得完了: {current_url}, "
@@ -932,45 +1645,34 @@ async def get_full_screenshot(
             'file_path': str,     # 保存したファイルのフルパス
             'url': str,           # 現在のURL
             'title': str          # ページタイトル
-            'screenshot': bytes,  # 画像バイナリ (include_image_binary=True の場合のみ)
+            'screenshot': bytes,  # 保存したファイルと同じ形式の画像バイナリ
+            #   (include_image_binary=True の場合のみ)
         }
 
     """
     logger.info("全領域のスクリーンショット取得開始")
 
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url)
 
     # 現在の状態を取得
     current_url = page.url
 
     # ページが完全に読み込まれるまで待機
-    await _page_wait_for_load_state(page)
-
-    # タイトルを取得
-    try:
-        title = await page.title()
-    except Exception:
-        title = "Unknown"
-        logger.warning("タイトル取得に失敗しました")
-
-    # 全領域のスクリーンショット取得
-    screenshot_bytes = await page.screenshot(full_page=True)
-
-    # サイズ調整（全領域は特に大きくなりがちなので、より小さい制限を設定）
-    # やっぱりリサイズしない
-    # screenshot_bytes = _resize_image_if_needed(
-    #     screenshot_bytes, max_size_bytes=800000
-    # )
+    # (URL 指定時は _get_active_page で待機済み)
+    if not url:
+        await _page_wait_for_load_state(page)
 
-    # ファイルに保存
-    downloads_dir = os.path.expanduser("~/Downloads")
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"browser-bot-screenshot-{timestamp}.png"
-    file_path = os.path.join(downloads_dir, filename)
+    # 保存先のファイルパス
+    file_path = _get_download_path(
+        "browser-bot-screenshot", _SCREENSHOT_EXTENSION
+    )
 
-    with open(file_path, "wb") as f:
-        f.write(screenshot_bytes)
+    # タイトルと全領域のスクリーンショットを並行して取得
+    # (path を渡すと、ファイル書き込みはイベントループの外で行われる)
+    title, screenshot_bytes = await asyncio.gather(
+        _get_page_title(page),
+        page.screenshot(path=file_path, full_page=True, **_SCREENSHOT_OPTIONS),
+    )
 
     logger.info(
         f"全領域のスクリーンショット取得完了: {current_url}, "
@@ -1023,8 +1725,7 @@ async def login_and_screenshot(
     """
     logger.info(f"ログイン＆スクリーンショット開始: {url}")
 
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url)
 
     # ログインフォームの表示を待機
     await page.wait_for_selector(username_selector, timeout=10000)
@@ -1039,23 +1740,18 @@ async def login_and_screenshot(
     await _page_wait_for_load_state(page)
 
     current_url = page.url
-    try:
-        title = await page.title()
-    except Exception:
-        title = "Unknown"
-        logger.warning("タイトル取得に失敗しました")
-
-    # フルスクリーンショット取得
-    screenshot_bytes = await page.screenshot(full_page=True)
 
-    # ファイルに保存
-    downloads_dir = os.path.expanduser("~/Downloads")
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    filename = f"browser-bot-screenshot-{timestamp}.png"
-    file_path = os.path.join(downloads_dir, filename)
+    # 保存先のファイルパス
+    file_path = _get_download_path(
+        "browser-bot-screenshot", _SCREENSHOT_EXTENSION
+    )
 
-    with open(file_path, "wb") as f:
-        f.write(screenshot_bytes)
+    # タイトルとフルスクリーンショットを並行して取得
+    # (path を渡すと、ファイル書き込みはイベントループの外で行われる)
+    title, _ = await asyncio.gather(
+        _get_page_title(page),
+        page.screenshot(path=file_path, full_page=True, **_SCREENSHOT_OPTIONS),
+    )
 
     logger.info(
         f"ログイン＆スクリーンショット完了: {current_url}, "
@@ -1082,19 +1778,14 @@ async def get_current_url():
     """
     logger.info("現在の URL 取得開始")
 
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=None, create_new_page=False)
+    page, browser = await _get_active_page(url=None, create_new_page=False)
 
     try:
         # 現在の状態を取得
         current_url = page.url
 
         # タイトルを取得
-        try:
-            title = await page.title()
-        except Exception:
-            title = "Unknown"
-            logger.warning("タイトル取得に失敗しました")
+        title = await _get_page_title(page)
 
         logger.info(f"現在の URL 取得完了: {current_url}")
 
@@ -1124,11 +1815,7 @@ async def super_reload(*, url: str | None = None, mode: str = "cdp"):
     """
     logger.info("スーパーリロード開始")
 
-    # Chrome が起動しているか確認
-    await _check_chrome_running()
-
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url)
 
     try:
         # 現在の URL を保存
@@ -1143,25 +1830,15 @@ async def super_reload(*, url: str | None = None, mode: str = "cdp"):
         # Playwright の reload メソッドでキャッシュを無視してリロード
         logger.info(f"スーパーリロード実行中: {current_url}, {mode=}")
 
-        if mode == "javascript":
-            # JavaScript を使ってスーパーリロード
-            await _super_reload_with_javascript(page)
-        elif mode == "keyboard":
-            # キーボードショートカットを使ってスーパーリロード
-            await _super_reload_with_keyboard(page)
-        else:
-            # CDP (Chrome DevTools Protocol) を使ってスーパーリロード
-            await _super_reload_with_cdp(page)
+        # 未知の mode は CDP (Chrome DevTools Protocol) でリロードする
+        reload_method = _SUPER_RELOAD_METHODS.get(mode, _super_reload_with_cdp)
+        await reload_method(page)
 
         # リロード完了を待つ
         await _page_wait_for_load_state(page)
 
         # タイトルを取得
-        try:
-            title = await page.title()
-        except Exception:
-            title = "Unknown"
-            logger.warning("タイトル取得に失敗しました")
+        title = await _get_page_title(page)
 
         final_url = page.url
         logger.info(f"スーパーリロード完了: {final_url}")
@@ -1177,6 +1854,29 @@ async def super_reload(*, url: str | None = None, mode: str = "cdp"):
         raise BrowserBotTaskFailedError(error_msg)
 
 
+# ページごとの CDP セッション
+# (呼び出しのたびに attach し直さず、ページが閉じられるまで使い回す)
+_page_cdp_sessions = weakref.WeakKeyDictionary()
+
+
+async def _get_cdp_session(page):
+    """
+    ページの CDP セッションを返す。まだなければ作成する
+
+    Args:
+        page: Playwright のページオブジェクト
+
+    Returns:
+        CDPSession: ページに attach した CDP セッション
+
+    """
+    cdp_session = _page_cdp_sessions.get(page)
+    if cdp_session is None:
+        cdp_session = await page.context.new_cdp_session(page)
+        _page_cdp_sessions[page] = cdp_session
+    return cdp_session
+
+
 async def _super_reload_with_cdp(page):
     """
     CDP (Chrome DevTools Protocol) を使用してスーパーリロードを実行する
@@ -1189,10 +1889,12 @@ async def _super_reload_with_cdp(page):
 
     """
     try:
-        cdp_session = await page.context.new_cdp_session(page)
+        cdp_session = await _get_cdp_session(page)
         await cdp_session.send("Page.reload", {"ignoreCache": True})
         logger.info("CDP を使用してスーパーリロードを実行しました")
     except Exception as e:
+        # セッションが切れている可能性があるので、次回は作り直す
+        _page_cdp_sessions.pop(page, None)
         logger.error(f"CDP リロードエラー: {e.__class__.__name__}: {e}")
         raise BrowserBotTaskFailedError(f"CDP リロードエラー: {e}")
 
@@ -1209,20 +1911,9 @@ async def _super_reload_with_keyboard(page):
 
     """
     try:
-        import platform
-
-        if platform.system() == "Darwin":  # macOS
-            await page.keyboard.down("Meta")
-            await page.keyboard.down("Shift")
-            await page.keyboard.press("R")
-            await page.keyboard.up("Shift")
-            await page.keyboard.up("Meta")
-        else:  # Windows/Linux
-            await page.keyboard.down("Control")
-            await page.keyboard.down("Shift")
-            await page.keyboard.press("R")
-            await page.keyboard.up("Shift")
-            await page.keyboard.up("Control")
+        # ControlOrMeta は macOS では Meta、Windows/Linux では Control になる
+        # (修飾キーの押下・解放を 1 回の呼び出しでまとめて送る)
+        await page.keyboard.press("ControlOrMeta+Shift+R")
 
         logger.info("キーボードショートカットでスーパーリロードを実行しました")
     except Exception as e:
@@ -1246,29 +1937,24 @@ async def _super_reload_with_javascript(page):
 
     """
     try:
-        await page.evaluate(
-            """
-            () => {
-                // location.reload(true) は deprecated だが、多くのブラウザでまだ動作する
-                if (typeof location.reload === 'function') {
-                    try {
-                        location.reload(true);
-                    } catch (e) {
-                        // 方法2: キャッシュバスティング用のタイムスタンプを追加
-                        const url = new URL(window.location.href);
-                        url.searchParams.set('_t', Date.now().toString());
-                        window.location.href = url.toString();
-                    }
-                }
-            }
-        """
-        )
+        await page.evaluate(_FORCE_RELOAD_SCRIPT)
         logger.info("JavaScript でスーパーリロードを実行しました")
     except Exception as e:
         logger.error(f"JavaScript リロードエラー: {e.__class__.__name__}: {e}")
         raise BrowserBotTaskFailedError(f"JavaScript リロードエラー: {e}")
 
 
+# super_reload の mode ごとのリロード方法
+_SUPER_RELOAD_METHODS = {
+    # CDP (Chrome DevTools Protocol) を使ってスーパーリロード
+    "cdp": _super_reload_with_cdp,
+    # JavaScript を使ってスーパーリロード
+    "javascript": _super_reload_with_javascript,
+    # キーボードショートカットを使ってスーパーリロード
+    "keyboard": _super_reload_with_keyboard,
+}
+
+
 async def run_script(*, script: str, url: str | None = None):
     """
     JavaScript を受け取って、Playwright を使ってブラウザ上でそのスクリプトを実行する
@@ -1290,36 +1976,32 @@ async def run_script(*, script: str, url: str | None = None):
         )
 
     logger.info("JavaScript スクリプト実行開始")
-    logger.debug(f"スクリプト内容: {script}...")
+    logger.debug("スクリプト内容: %s...", script)
 
     if url:
         logger.info(f"指定 URL: {url}")
 
-    # Chrome が起動しているか確認
-    chrome_check_error = await _check_chrome_running()
-    if chrome_check_error:
-        return None
-
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url, use_cache=True)
 
     try:
         # ページが完全に読み込まれるまで待機
-        await _page_wait_for_load_state(page)
+        # (URL 指定時は _get_active_page で待機済み)
+        if not url:
+            await _page_wait_for_load_state(page)
 
         # JavaScript を実行
         # スクリプトを async function で囲って実行
         wrapped_script = f"(async () => {{\n{script}\n}})();"
         result = await page.evaluate(wrapped_script)
-        logger.info(f"✅ JavaScript スクリプト実行完了: result={result}")
+        logger.info("✅ JavaScript スクリプト実行完了")
 
         # 実行結果をログに記録（結果が大きい場合は切り詰める）
         if result is not None:
             result_str = str(result)
             if len(result_str) > 500:
-                logger.debug(f"実行結果: {result_str[:500]}...")
+                logger.debug("実行結果: %s...", result_str[:500])
             else:
-                logger.debug(f"実行結果: {result_str}")
+                logger.debug("実行結果: %s", result_str)
 
         return result
 
@@ -1329,6 +2011,30 @@ async def run_script(*, script: str, url: str | None = None):
         raise BrowserBotTaskFailedError(error_msg)
 
 
+@functools.lru_cache(maxsize=128)
+def _compile_user_script(python_script_text: str):
+    """
+    利用者の Python スクリプトを async 関数 user_script() の定義にラップして
+    コンパイルする
+    エージェントは同じスクリプトを繰り返し送ってくることが多いので、
+    コンパイル結果をキャッシュする
+
+    Args:
+        python_script_text: 実行する Python コード
+
+    Returns:
+        CodeType: user_script() を定義するコードオブジェクト
+
+    """
+    # async 関数として実行するためにラップ
+    # (textwrap.indent は空行をインデントしない)
+    wrapped_script = "async def user_script():\n" + textwrap.indent(
+        python_script_text, "    "
+    )
+    logger.debug("wrapped_script: %s", wrapped_script)
+    return compile(wrapped_script, "<string>", "exec")
+
+
 async def run_python_script(
     *, python_script_text: str | None = None, url: str | None = None
 ):
@@ -1357,33 +2063,27 @@ async def run_python_script(
 
     logger.info("Python スクリプト実行開始")
 
-    await _check_chrome_running()
-
-    p = await async_playwright().start()
-    page, browser = await _get_active_page(p, url=url)
+    page, browser = await _get_active_page(url=url, use_cache=True)
 
     # ページが完全に読み込まれるまで待機
-    await _page_wait_for_load_state(page)
+    # (URL 指定時は _get_active_page で待機済み)
+    if not url:
+        await _page_wait_for_load_state(page)
 
     # page オブジェクトを利用可能にして Python スクリプトを実行
     local_vars = {"page": page, "asyncio": asyncio}
     global_vars = {"page": page, "asyncio": asyncio}
     try:
-        # async 関数として実行するためにラップ
-        wrapped_script = f"""
-async def user_script():
-{chr(10).join("    " + line for line in python_script_text.strip().split(chr(10)))}
-"""
-        logger.debug("wrapped_script: %s", wrapped_script)
         # 関数を定義
-        compiled_code = compile(wrapped_script, "<string>", "exec")
+        compiled_code = _compile_user_script(python_script_text.strip())
         # S102: 利用者が渡した Playwright スクリプトを実行するのが
         # このツールの機能そのもの (MCP クライアントは信頼済みの前提)。
         exec(compiled_code, global_vars, local_vars)  # noqa: S102
         # 定義した関数を実行
         result = await local_vars["user_script"]()
+        # 結果が大きいこともあるので、repr はログが出るときだけ作る
         logger.info(
-            f"カスタム Python スクリプトの実行が完了しました: {result=}"
+            "カスタム Python スクリプトの実行が完了しました: result=%r", result
         )
         return result
 
@@ -1393,13 +2093,146 @@ async def user_script():
         raise BrowserBotTaskFailedError(error_msg)
 
 
-async def launch_chrome(*, as_guest: bool = True) -> dict:
+# launch_chrome が探す Chrome の実行パス (platform.system() ごと、優先順)
+_CHROME_PATHS_BY_SYSTEM = {
+    "Darwin": (
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        (
+            "/Applications/Google Chrome Canary.app/Contents/MacOS/"
+            "Google Chrome Canary"
+        ),
+        "/Applications/Chromium.app/Contents/MacOS/Chromium",
+    ),
+    "Linux": (
+        "/usr/bin/google-chrome",
+        "/usr/bin/google-chrome-stable",
+        "/usr/bin/chromium",
+        "/usr/bin/chromium-browser",
+        "/snap/bin/chromium",
+    ),
+    "Windows": (
+        r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+        r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    ),
+}
+
+
+# launch_chrome が Chrome に渡す、モードによらない共通の起動引数
+_CHROME_BASE_ARGS = (
+    f"--remote-debugging-port={CHROME_DEBUG_PORT}",
+    "--no-first-run",
+    "--disable-default-apps",
+)
+
+
+@functools.cache
+def _find_chrome_executable() -> str | None:
+    """
+    Chrome の実行パスを探す
+    (起動し直すたびにファイルの存在確認をしないよう、結果はキャッシュする)
+
+    Returns:
+        str | None: 見つかった実行パス。見つからない場合は None
+
+    """
+    import platform
+
+    paths = _CHROME_PATHS_BY_SYSTEM.get(platform.system(), ())
+    return next((path for path in paths if os.path.exists(path)), None)
+
+
+async def _wait_for_chrome_ready(timeout: float = 7.0) -> str | None:
+    """
+    起動した Chrome が /json/version に応答するまで待つ
+    固定時間待たずに、間隔を広げながら問い合わせて、応答した時点で返す
+
+    Args:
+        timeout: 待機する最大秒数
+
+    Returns:
+        str | None: ブラウザのバージョン情報。時間内に応答しなければ None
+
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = 0.05
+    while True:
+        # S110: 起動途中は接続できないのが普通なので、応答するまで問い合わせ続ける
+        try:
+            response = await _get_http_client().get(
+                f"{CHROME_DEBUG_URL}/json/version", timeout=1
+            )
+            if response.status_code == 200:
+                return response.json().get("Browser", "Unknown")
+        except Exception:  # noqa: S110
+            pass
+
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return None
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.5)
+
+
+# launch_chrome(connect=True) がバックグラウンドで進める準備のタスク
+# (参照を持っておかないと、実行中にガベージコレクションされることがある)
+#   imports: run_task で使う重いモジュールの読み込み
+#   task: 起動した Chrome への CDP 接続
+_prewarm_state = {"imports": None, "task": None}
+
+
+def _preload_agent_modules():
+    """
+    run_task で使う browser_use と LLM クライアントを読み込んでおく
+    (数秒かかるので、Chrome の起動を待つ間に他のスレッドで行う)
+    """
+    try:
+        import browser_use  # noqa: F401
+
+        get_llm()
+        logger.debug("browser_use と LLM クライアントを読み込みました")
+    except Exception as e:
+        # run_task で改めて読み込むので、ここでは記録するだけにする
+        logger.debug(f"browser_use の事前読み込みに失敗しました: {e}")
+
+
+async def _prewarm_browser():
+    """起動した Chrome に接続しておき、次のツール呼び出しで使い回させる"""
+    try:
+        await _get_browser()
+        logger.debug("起動した Chrome に事前接続しました")
+    except Exception as e:
+        # 次のツール呼び出しで接続し直すので、ここでは記録するだけにする
+        logger.debug(f"Chrome への事前接続に失敗しました: {e}")
+
+
+async def _finish_browser_prewarm():
+    """
+    実行中の事前準備のタスクがあれば終わるまで待つ
+    (Playwright の起動途中でキャンセルすると、Playwright 内部のタスクが
+    残ってイベントループを終了できなくなるので、キャンセルはしない)
+    """
+    loop = asyncio.get_running_loop()
+    for key in ("imports", "task"):
+        task = _prewarm_state[key]
+        _prewarm_state[key] = None
+        # 別のイベントループで作ったタスクは待てないので捨てるだけにする
+        if task is not None and task.get_loop() is loop:
+            await task
+
+
+async def launch_chrome(
+    *, as_guest: bool = True, connect: bool = False
+) -> dict:
     """
     Chrome をデバッグポート付きで起動する。
     既に起動済みならその旨を返す。
 
     Args:
         as_guest: True=ゲストモード, False=通常モード
+        connect: True なら起動を待つ間に browser_use を読み込み、
+            起動を確認した後にバックグラウンドで CDP 接続を確立しておく
+            (MCP サーバーのように、続けて他のツールを呼ぶ長寿命のプロセス向け)
 
     Returns:
         dict: {
@@ -1409,17 +2242,6 @@ async def launch_chrome(*, as_guest: bool = True) -> dict:
         }
 
     """
-    import platform
-    import socket
-
-    chrome_debug_port = int(
-        CHROME_DEBUG_URL.replace("http://", "")
-        .replace("https://", "")
-        .split(":")[1]
-        if ":" in CHROME_DEBUG_URL.replace("http://", "")
-        else "9222"
-    )
-
     if BROWSER_BOT_USE_REMOTE:
         return {
             "status": "already_running",
@@ -1429,79 +2251,43 @@ async def launch_chrome(*, as_guest: bool = True) -> dict:
             "browser_info": None,
         }
 
-    # ポートが使用中かチェック
-    def is_port_in_use(port: int) -> bool:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            try:
-                s.bind(("", port))
-                return False
-            except OSError:
-                return True
-
-    if is_port_in_use(chrome_debug_port):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{CHROME_DEBUG_URL}/json/version", timeout=2
-                )
-                if response.status_code == 200:
-                    version_info = response.json()
-                    browser_info = version_info.get("Browser", "Unknown")
-                    return {
-                        "status": "already_running",
-                        "message": (
-                            f"Chrome は既に起動しています ({CHROME_DEBUG_URL})"
-                        ),
-                        "browser_info": browser_info,
-                    }
-        except Exception as e:
-            return {
-                "status": "error",
-                "message": (
-                    f"ポート {chrome_debug_port} は使用中ですが、"
-                    f"Chrome ではない可能性があります "
-                    f"({e.__class__.__name__}: {e})"
-                ),
-                "browser_info": None,
-            }
+    # /json/version に 1 回問い合わせて、起動済みか・別のプロセスが
+    # ポートを使っているか・何も動いていないかを判定する
+    import httpx
 
-    # Chrome の実行パスを取得
-    system = platform.system()
-    chrome_paths = []
-
-    if system == "Darwin":
-        chrome_paths = [
-            ("/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"),
-            (
-                "/Applications/Google Chrome Canary.app/Contents/MacOS/"
-                "Google Chrome Canary"
-            ),
-            "/Applications/Chromium.app/Contents/MacOS/Chromium",
-        ]
-    elif system == "Linux":
-        chrome_paths = [
-            "/usr/bin/google-chrome",
-            "/usr/bin/google-chrome-stable",
-            "/usr/bin/chromium",
-            "/usr/bin/chromium-browser",
-            "/snap/bin/chromium",
-        ]
-    elif system == "Windows":
-        chrome_paths = [
-            r"C:\Program Files\Google\Chrome\Application\chrome.exe",
-            (
-                r"C:\Program Files (x86)\Google\Chrome\Application"
-                r"\chrome.exe"
+    try:
+        response = await _get_http_client().get(
+            f"{CHROME_DEBUG_URL}/json/version", timeout=2
+        )
+        response.raise_for_status()
+        browser_info = response.json().get("Browser", "Unknown")
+        return {
+            "status": "already_running",
+            "message": f"Chrome は既に起動しています ({CHROME_DEBUG_URL})",
+            "browser_info": browser_info,
+        }
+    except httpx.ConnectError:
+        # 何も動いていないので起動する
+        pass
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": (
+                f"ポート {CHROME_DEBUG_PORT} は使用中ですが、"
+                f"Chrome ではない可能性があります "
+                f"({e.__class__.__name__}: {e})"
             ),
-        ]
-
-    chrome_executable = None
-    for path in chrome_paths:
-        if os.path.exists(path):
-            chrome_executable = path
-            break
+            "browser_info": None,
+        }
 
+    # Chrome の実行パスを取得
+    # ファイルの存在確認やプロセスの起動でイベントループを止めないよう、
+    # 他のスレッドで行う
+    chrome_executable = await asyncio.to_thread(_find_chrome_executable)
     if not chrome_executable:
+        # 後から Chrome がインストールされたら見つけられるよう、
+        # 見つからなかった結果はキャッシュしない
+        _find_chrome_executable.cache_clear()
         return {
             "status": "error",
             "message": "Chrome が見つかりません",
@@ -1510,61 +2296,51 @@ async def launch_chrome(*, as_guest: bool = True) -> dict:
 
     mode_text = "ゲストモード" if as_guest else "通常モード"
 
-    chrome_args = [
-        chrome_executable,
-        f"--remote-debugging-port={chrome_debug_port}",
-        "--no-first-run",
-        "--disable-default-apps",
-    ]
-
     if as_guest:
         user_data_dir = os.path.expanduser("~/.google-chrome-debug-guest")
-        chrome_args.extend(
-            [
-                f"--user-data-dir={user_data_dir}",
-                "--guest",
-            ]
-        )
+        mode_args = (f"--user-data-dir={user_data_dir}", "--guest")
     else:
         user_data_dir = os.path.expanduser("~/.google-chrome-debug")
-        chrome_args.append(f"--user-data-dir={user_data_dir}")
+        mode_args = (f"--user-data-dir={user_data_dir}",)
+    chrome_args = [chrome_executable, *_CHROME_BASE_ARGS, *mode_args]
 
     try:
-        # S603: chrome_args は定数と実行環境のパスから組み立てており、
+        # chrome_args は定数と実行環境のパスから組み立てており、
         # 利用者入力を含まない。shell も介さない。
-        subprocess.Popen(  # noqa: S603
+        # start_new_session: MCP サーバーが終了しても Chrome を道連れに
+        # しない (次の呼び出しで起動済みとして使い回せる)
+        await asyncio.to_thread(
+            subprocess.Popen,
             chrome_args,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
+            start_new_session=True,
         )
-        await asyncio.sleep(2)
-
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{CHROME_DEBUG_URL}/json/version", timeout=5
+        if connect and _prewarm_state["imports"] is None:
+            _prewarm_state["imports"] = asyncio.create_task(
+                asyncio.to_thread(_preload_agent_modules)
+            )
+        browser_info = await _wait_for_chrome_ready()
+        if browser_info is not None:
+            if connect:
+                _prewarm_state["task"] = asyncio.create_task(
+                    _prewarm_browser()
                 )
-                if response.status_code == 200:
-                    version_info = response.json()
-                    browser_info = version_info.get("Browser", "Unknown")
-                    return {
-                        "status": "launched",
-                        "message": (
-                            f"Chrome を{mode_text}で起動しました "
-                            f"(ポート {chrome_debug_port})"
-                        ),
-                        "browser_info": browser_info,
-                    }
-        # S110: 起動確認は best-effort。失敗しても Chrome の起動自体は
-        # 済んでいるので、下の「起動確認はできませんでした」を返して続行する。
-        except Exception:  # noqa: S110
-            pass
+            return {
+                "status": "launched",
+                "message": (
+                    f"Chrome を{mode_text}で起動しました "
+                    f"(ポート {CHROME_DEBUG_PORT})"
+                ),
+                "browser_info": browser_info,
+            }
 
         return {
             "status": "launched",
             "message": (
                 f"Chrome を{mode_text}で起動しました "
-                f"(ポート {chrome_debug_port})。"
+                f"(ポート {CHROME_DEBUG_PORT})。"
                 "起動確認はできませんでした。"
             ),
             "browser_info": None,
@@ -1580,6 +2356,92 @@ async def launch_chrome(*, as_guest: bool = True) -> dict:
         }
 
 
+async def _dispatch_serve_request(request_data: dict):
+    """
+    --serve モードで受け取った 1 件のリクエストを実行する
+
+    Args:
+        request_data: {
+            'mode': str,       # 'task' (デフォルト), 'script', 'python_script'
+            'input': str,      # タスク、JavaScript、Python スクリプト
+            'url': str,        # 実行前に開く URL (省略可)
+            'max_steps': int,  # タスクの最大ステップ数 (省略可)
+        }
+
+    Returns:
+        実行結果
+
+    """
+    mode = request_data.get("mode", "task")
+    text = request_data.get("input", "")
+    url = request_data.get("url")
+
+    if mode == "python_script":
+        return await run_python_script(python_script_text=text, url=url)
+    if mode == "script":
+        return await run_script(script=text, url=url)
+    if mode == "task":
+        return await run_task(
+            task=text, max_steps=request_data.get("max_steps"), url=url
+        )
+
+    error_msg = f"❌ エラー: 不明なモードです: {mode}"
+    logger.error(error_msg)
+    raise BrowserBotTaskAbortedError(error_msg)
+
+
+async def serve_stdin():
+    """
+    標準入力から 1 行 1 件の JSON リクエストを読み、結果を 1 行の JSON で返す
+
+    1 つのイベントループで処理し続けるので、ブラウザ接続や LLM クライアントを
+    リクエスト間で使い回せる。
+    成功時は {"result": 結果}、失敗時は {"error": str} を出力する。
+    結果の dict や list などは JSON の値のまま出力し、JSON にできない値は
+    文字列にする。
+
+    """
+    try:
+        while line := await asyncio.to_thread(sys.stdin.readline):
+            if not line.strip():
+                continue
+            try:
+                result = await _dispatch_serve_request(json.loads(line))
+                response = {"result": result}
+            except BrowserBotError as e:
+                response = {"error": str(e)}
+            except Exception as e:
+                logger.error(
+                    f"❌ エラー: リクエストの処理に失敗しました: "
+                    f"{e.__class__.__name__}: {e}",
+                    exc_info=True,
+                )
+                response = {"error": f"{e.__class__.__name__}: {e}"}
+            sys.stdout.write(
+                json.dumps(response, ensure_ascii=False, default=str) + "\n"
+            )
+            sys.stdout.flush()
+    finally:
+        await shutdown()
+
+
+async def run_and_shutdown(coro):
+    """
+    コルーチンを実行し、終了時に使い回しているブラウザ接続などを解放する
+
+    Args:
+        coro: 実行するコルーチン
+
+    Returns:
+        コルーチンの戻り値
+
+    """
+    try:
+        return await coro
+    finally:
+        await shutdown()
+
+
 epilog = """
 # Using javascript script example
 [tests/test-script.sh]
@@ -1614,10 +2476,20 @@ await asyncio.sleep(2)
 return f'完了しました。 URL: {page.url}'
 " | .venv/bin/python browser_bot.py --python-script --url https://www.mangazenkan.com
 ```
+
+# Serve mode example
+Read one JSON request per line and write one JSON result per line,
+keeping the browser connection open between requests.
+
+```shell
+echo '{"mode": "script", "input": "return document.title"}
+{"mode": "task", "input": "Click the login button", "max_steps": 5}' \\
+  | .venv/bin/python browser_bot.py --serve
+```
 """
 
 if __name__ == "__main__":
-    dotenv.load_dotenv()
+    loop_factory = get_event_loop_factory()
 
     parser = argparse.ArgumentParser(
         description="Run a browser automation task.",
@@ -1644,8 +2516,17 @@ if __name__ == "__main__":
         type=str,
         help="URL to navigate to before executing the task or script.",
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Read newline-delimited JSON requests from stdin until EOF.",
+    )
     args = parser.parse_args()
 
+    if args.serve:
+        asyncio.run(serve_stdin(), loop_factory=loop_factory)
+        sys.exit(0)
+
     if not sys.stdin.isatty():
         # 標準入力からタスクを読み取る
         task = sys.stdin.read().strip()
@@ -1667,26 +2548,41 @@ if __name__ == "__main__":
         if args.python_script:
             # Playwright 用の Python スクリプトを実行
             result = asyncio.run(
-                run_python_script(python_script_text=task, url=args.url)
+                run_and_shutdown(
+                    run_python_script(python_script_text=task, url=args.url)
+                ),
+                loop_factory=loop_factory,
             )
             if result is not None:
                 print(result)
 
         elif args.script:
             # Playwright 内で JavaScript を実行
-            result = asyncio.run(run_script(script=task, url=args.url))
+            result = asyncio.run(
+                run_and_shutdown(run_script(script=task, url=args.url)),
+                loop_factory=loop_factory,
+            )
             if result is not None:
                 print(result)
         else:
             # browser_use のタスク
             asyncio.run(
-                run_task(task=task, max_steps=args.max_steps, url=args.url)
+                run_and_shutdown(
+                    run_task(task=task, max_steps=args.max_steps, url=args.url)
+                ),
+                loop_factory=loop_factory,
             )
     except BrowserBotError as e:
         logger.error(f"❌ エラー: {e}")
         sys.exit(1)
 
 
+# request() で使える HTTP メソッド (APIRequestContext のメソッド名)
+_REQUEST_METHODS = frozenset(
+    {"get", "post", "put", "delete", "patch", "head", "options"}
+)
+
+
 async def request(
     *, method, url: str, preload_url: str | None = None, **kwargs
 ) -> APIResponse:
@@ -1711,29 +2607,29 @@ async def request(
             await test() レスポンス本文をテキストで取得 (utf-8に限る)
 
     """
-    # Chrome が起動しているか確認
-    await _check_chrome_running()
-
     method = method.lower()
-    if method not in {
-        "get",
-        "post",
-        "put",
-        "delete",
-        "patch",
-        "head",
-        "options",
-    }:
+    if method not in _REQUEST_METHODS:
         error_msg = (
             f"❌ エラー: サポートされていない HTTP メソッドです: {method}"
         )
         logger.error(error_msg)
         raise BrowserBotTaskAbortedError(error_msg)
 
-    p = await async_playwright().start()
-    page, _browser = await _get_active_page(p, url=preload_url)
+    if preload_url:
+        page, _browser = await _get_active_page(url=preload_url)
+        request_context = page.request
+    else:
+        # 遷移しないならアクティブなタブを探す必要はない。
+        # ページの request はコンテキストの request と同じもの
+        # (Cookie も共有) なので、既定のコンテキストから直接送る
+        browser = await _get_browser()
+        if browser.contexts:
+            request_context = browser.contexts[0].request
+        else:
+            page, _browser = await _get_active_page(url=None)
+            request_context = page.request
 
-    request_metod = getattr(page.request, method)
+    request_metod = getattr(request_context, method)
 
     response: APIResponse = await request_metod(
         url,
@@ -1753,6 +2649,113 @@ async def request(
     }
 
 
+def _write_new_file(file_path: str, data: bytes) -> str:
+    """
+    既存のファイルを上書きしないように、新しいファイルを作って書き込む
+    (_get_download_path のファイル名は秒単位なので、同じ秒に保存すると
+    同じ名前になる。その場合は連番を付ける)
+
+    Args:
+        file_path: 書き込みたいファイルのパス
+        data: 書き込むデータ
+
+    Returns:
+        str: 実際に書き込んだファイルのパス
+
+    """
+    base, extension = os.path.splitext(file_path)
+    candidate = file_path
+    number = 1
+    while True:
+        try:
+            with open(candidate, "xb") as f:
+                f.write(data)
+        except FileExistsError:
+            candidate = f"{base}-{number}{extension}"
+            number += 1
+        else:
+            return candidate
+
+
+async def save_response_body(body: bytes, *, content_type: str = "") -> str:
+    """
+    レスポンス本文を保存先ディレクトリにファイルとして書き出す
+
+    Args:
+        body: レスポンス本文
+        content_type: Content-Type ヘッダー。拡張子の推定に使う
+
+    Returns:
+        str: 保存したファイルのパス
+
+    """
+    import mimetypes  # 使用時のみ必要なので遅延インポート
+
+    extension = mimetypes.guess_extension(
+        content_type.split(";", 1)[0].strip()
+    )
+    file_path = _get_download_path(
+        "response", extension.lstrip(".") if extension else "bin"
+    )
+    # 大きな本文の書き込みでイベントループを止めないようにする
+    file_path = await asyncio.to_thread(_write_new_file, file_path, body)
+    logger.info(f"レスポンス本文を保存しました: {file_path}")
+    return file_path
+
+
+# run_lighthouse で指定できる監査カテゴリとデバイス
+_LIGHTHOUSE_CATEGORIES = frozenset(
+    {"performance", "accessibility", "best-practices", "seo", "pwa"}
+)
+_LIGHTHOUSE_DEVICES = frozenset({"desktop", "mobile"})
+
+# Lighthouse の audit ID と、結果に載せるメトリクス名
+_LIGHTHOUSE_METRIC_KEYS = {
+    "first-contentful-paint": "FCP",
+    "largest-contentful-paint": "LCP",
+    "total-blocking-time": "TBT",
+    "cumulative-layout-shift": "CLS",
+    "speed-index": "SI",
+    "interactive": "TTI",
+}
+
+
+def _parse_lighthouse_report(json_path: str) -> tuple[dict, dict]:
+    """
+    Lighthouse の JSON レポートからカテゴリ別スコアと主要メトリクスを抽出する
+
+    Args:
+        json_path: JSON レポートのファイルパス
+
+    Returns:
+        tuple[dict, dict]: (カテゴリ別スコア, 主要メトリクス)
+
+    """
+    with open(json_path, "rb") as f:
+        report = json.loads(f.read())
+
+    # カテゴリ別スコアを抽出
+    scores = {}
+    for cat_id, cat_data in report.get("categories", {}).items():
+        scores[cat_id] = round(cat_data.get("score", 0) * 100)
+
+    # 主要メトリクスを抽出
+    audits = report.get("audits", {})
+    metrics = {}
+
+    # Performance メトリクス
+    for audit_key, metric_name in _LIGHTHOUSE_METRIC_KEYS.items():
+        if audit_key in audits:
+            audit = audits[audit_key]
+            metrics[metric_name] = {
+                "value": audit.get("numericValue"),
+                "display": audit.get("displayValue"),
+                "score": round((audit.get("score") or 0) * 100),
+            }
+
+    return scores, metrics
+
+
 async def run_lighthouse(
     *,
     url: str | None = None,
@@ -1795,11 +2798,7 @@ async def run_lighthouse(
 
     # URL が指定されていない場合は現在のページの URL を取得
     if not url:
-        await _check_chrome_running()
-        p = await async_playwright().start()
-        page, browser = await _get_active_page(
-            p, url=None, create_new_page=False
-        )
+        page, browser = await _get_active_page(url=None, create_new_page=False)
         url = page.url
         logger.info(f"現在のページの URL を使用: {url}")
 
@@ -1808,50 +2807,37 @@ async def run_lighthouse(
         categories = ["performance"]
 
     # 有効なカテゴリを検証
-    valid_categories = {
-        "performance",
-        "accessibility",
-        "best-practices",
-        "seo",
-        "pwa",
-    }
-    invalid_categories = set(categories) - valid_categories
+    invalid_categories = set(categories) - _LIGHTHOUSE_CATEGORIES
     if invalid_categories:
         error_msg = (
             f"❌ エラー: 無効なカテゴリ: {invalid_categories}。"
-            f"有効なカテゴリ: {valid_categories}"
+            f"有効なカテゴリ: {set(_LIGHTHOUSE_CATEGORIES)}"
         )
         logger.error(error_msg)
         raise BrowserBotTaskAbortedError(error_msg)
 
     # デバイスの検証
-    valid_devices = {"desktop", "mobile"}
-    if device not in valid_devices:
+    if device not in _LIGHTHOUSE_DEVICES:
         error_msg = (
             f"❌ エラー: 無効なデバイス: {device}。"
-            f"有効なデバイス: {valid_devices}"
+            f"有効なデバイス: {set(_LIGHTHOUSE_DEVICES)}"
         )
         logger.error(error_msg)
         raise BrowserBotTaskAbortedError(error_msg)
 
     # 出力ファイルパスを準備
-    downloads_dir = os.path.expanduser("~/Downloads")
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    base_filename = f"lighthouse-{timestamp}"
-    json_path = os.path.join(downloads_dir, f"{base_filename}.json")
-    html_path = os.path.join(downloads_dir, f"{base_filename}.html")
-
-    # Chrome のデバッグポートを取得
-    chrome_port = CHROME_DEBUG_URL.split(":")[-1]
+    base_path = _get_download_path("lighthouse")
+    json_path = f"{base_path}.json"
+    html_path = f"{base_path}.html"
 
     # Lighthouse コマンドを構築
     cmd = [
         npx_path,
         "lighthouse",
         url,
-        f"--port={chrome_port}",
+        f"--port={CHROME_DEBUG_PORT}",
         "--output=json,html",
-        f"--output-path={os.path.join(downloads_dir, base_filename)}",
+        f"--output-path={base_path}",
         f"--only-categories={','.join(categories)}",
         "--quiet",
         "--chrome-flags=--ignore-certificate-errors",
@@ -1868,52 +2854,38 @@ async def run_lighthouse(
 
     try:
         # Lighthouse を実行
-        result = await asyncio.to_thread(
-            subprocess.run,
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout_seconds,
+        # (スレッドで subprocess.run を待つとスレッドプールのワーカーを
+        # 最大 timeout_seconds 占有するので、イベントループ上で待つ。
+        # --quiet で stdout には何も出ないので捨てる)
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
         )
+        try:
+            _, stderr_bytes = await asyncio.wait_for(
+                proc.communicate(), timeout=timeout_seconds
+            )
+        except TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
 
-        if result.returncode != 0:
+        if proc.returncode != 0:
+            stderr = stderr_bytes.decode(errors="replace")
             error_msg = (
-                f"❌ Lighthouse 実行エラー (code={result.returncode}): "
-                f"{result.stderr[:500] if result.stderr else 'unknown error'}"
+                f"❌ Lighthouse 実行エラー (code={proc.returncode}): "
+                f"{stderr[:500] if stderr else 'unknown error'}"
             )
             logger.error(error_msg)
             raise BrowserBotTaskFailedError(error_msg)
 
         # JSON レポートを読み込んでスコアとメトリクスを抽出
-        with open(json_path, encoding="utf-8") as f:
-            report = json.load(f)
-
-        # カテゴリ別スコアを抽出
-        scores = {}
-        for cat_id, cat_data in report.get("categories", {}).items():
-            scores[cat_id] = round(cat_data.get("score", 0) * 100)
-
-        # 主要メトリクスを抽出
-        audits = report.get("audits", {})
-        metrics = {}
-
-        # Performance メトリクス
-        metric_keys = {
-            "first-contentful-paint": "FCP",
-            "largest-contentful-paint": "LCP",
-            "total-blocking-time": "TBT",
-            "cumulative-layout-shift": "CLS",
-            "speed-index": "SI",
-            "interactive": "TTI",
-        }
-        for audit_key, metric_name in metric_keys.items():
-            if audit_key in audits:
-                audit = audits[audit_key]
-                metrics[metric_name] = {
-                    "value": audit.get("numericValue"),
-                    "display": audit.get("displayValue"),
-                    "score": round((audit.get("score") or 0) * 100),
-                }
+        # (数 MB になるレポートのパースでイベントループを止めないよう、
+        # 別スレッドで実行する)
+        scores, metrics = await asyncio.to_thread(
+            _parse_lighthouse_report, json_path
+        )
 
         logger.info(f"Lighthouse 監査完了: {url}, スコア: {scores}")
 
@@ -1925,7 +2897,7 @@ async def run_lighthouse(
             "json_path": json_path,
         }
 
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         error_msg = (
             f"❌ Lighthouse 実行がタイムアウトしました ({timeout_seconds}秒)"
         )
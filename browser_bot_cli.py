@@ -16,12 +16,14 @@ from browser_bot import (
     BrowserBotError,
     get_accessibility_snapshot,
     get_current_url,
+    get_event_loop_factory,
     get_full_screenshot,
     get_page_source,
     get_visible_screenshot,
     launch_chrome,
     login_and_screenshot,
     request,
+    run_and_shutdown,
     run_lighthouse,
     run_python_script,
     run_script,
@@ -48,6 +50,16 @@ def _read_stdin_or_exit(label: str) -> str:
     return text
 
 
+def _run(coro):
+    """
+    コルーチンを実行して結果を返す。
+    イベントループを閉じる前に browser_bot の共有リソースを解放する。
+    """
+    return asyncio.run(
+        run_and_shutdown(coro), loop_factory=get_event_loop_factory()
+    )
+
+
 def _print_json(data):
     print(json.dumps(data, ensure_ascii=False, indent=2))
 
@@ -57,7 +69,7 @@ def _print_json(data):
 
 def cmd_browser_use(args):
     task_text = _read_stdin_or_exit("タスクテキスト")
-    result = asyncio.run(
+    result = _run(
         run_task(
             task=task_text,
             max_steps=args.max_steps,
@@ -68,7 +80,7 @@ def cmd_browser_use(args):
 
 
 def cmd_snapshot(args):
-    result = asyncio.run(get_accessibility_snapshot(url=args.url))
+    result = _run(get_accessibility_snapshot(url=args.url))
     print(f"# {result['title']}")
     print(f"URL: {result['url']}")
     print()
@@ -76,12 +88,12 @@ def cmd_snapshot(args):
 
 
 def cmd_get_source(args):
-    result = asyncio.run(get_page_source(url=args.url))
+    result = _run(get_page_source(url=args.url))
     _print_json(result)
 
 
 def cmd_visible_screenshot(args):
-    result = asyncio.run(
+    result = _run(
         get_visible_screenshot(
             url=args.url,
             page_y_offset_as_viewport_height=(args.scroll),
@@ -92,7 +104,7 @@ def cmd_visible_screenshot(args):
 
 
 def cmd_full_screenshot(args):
-    result = asyncio.run(
+    result = _run(
         get_full_screenshot(
             url=args.url,
             include_image_binary=False,
@@ -103,31 +115,29 @@ def cmd_full_screenshot(args):
 
 def cmd_run_js(args):
     script = _read_stdin_or_exit("JavaScript コード")
-    result = asyncio.run(run_script(script=script, url=args.url))
+    result = _run(run_script(script=script, url=args.url))
     _print_json({"message": "OK", "result": result})
 
 
 def cmd_python_script(args):
     script = _read_stdin_or_exit("Python スクリプト")
-    result = asyncio.run(
-        run_python_script(python_script_text=script, url=args.url)
-    )
+    result = _run(run_python_script(python_script_text=script, url=args.url))
     if result is not None:
         print(result)
 
 
 def cmd_current_url(args):
-    result = asyncio.run(get_current_url())
+    result = _run(get_current_url())
     _print_json(result)
 
 
 def cmd_super_reload(args):
-    result = asyncio.run(super_reload(url=args.url, mode=args.mode))
+    result = _run(super_reload(url=args.url, mode=args.mode))
     _print_json(result)
 
 
 def cmd_launch_chrome(args):
-    result = asyncio.run(launch_chrome(as_guest=not args.no_guest))
+    result = _run(launch_chrome(as_guest=not args.no_guest))
     _print_json(result)
 
 
@@ -142,7 +152,7 @@ def cmd_http_request(args):
         if data.strip():
             kwargs["data"] = data
 
-    response_data = asyncio.run(
+    response_data = _run(
         request(
             method=args.method,
             url=args.request_url,
@@ -184,7 +194,7 @@ def cmd_login_screenshot(args):
         )
         sys.exit(1)
 
-    result = asyncio.run(
+    result = _run(
         login_and_screenshot(
             url=args.url,
             username=username,
@@ -203,7 +213,7 @@ def cmd_lighthouse(args):
     if args.categories:
         categories = [c.strip() for c in args.categories.split(",")]
 
-    result = asyncio.run(
+    result = _run(
         run_lighthouse(
             url=args.url,
             categories=categories,
@@ -1,16 +1,37 @@
 #!/usr/bin/env python3
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
 # ファイルハンドラーの設定
 log_file = "/tmp/browser-bot.log"
 
-file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
+# 長時間動かす MCP サーバーでも肥大化しないようにローテーションする
+# (delay=True で最初の書き込みまでファイルを開かない)
+file_handler = logging.handlers.RotatingFileHandler(
+    log_file,
+    mode="a",
+    maxBytes=50 * 1024 * 1024,
+    backupCount=3,
+    encoding="utf-8",
+    delay=True,
+)
 file_handler.setFormatter(
     logging.Formatter("%(asctime)s [%(name)s] [%(levelname)s] %(message)s")
 )
 
+# ログ出力はキュー経由でバックグラウンドスレッドに任せ、
+# イベントループ上でファイル書き込みを待たないようにする
+log_queue = queue.SimpleQueue()
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_listener = logging.handlers.QueueListener(log_queue, file_handler)
+queue_listener.start()
+# 終了時にキューに残ったログを書き出す
+atexit.register(queue_listener.stop)
+
 # ルートロガーの設定
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
@@ -33,7 +54,7 @@ def setup_logger_for_mcp_server():
     logger_set_up = True
 
     logger.handlers = []  # 既存のハンドラーをクリア
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
 
     # サードパーティーのロガーも設定
     for logger_name, log_level in [
@@ -49,7 +70,7 @@ def setup_logger_for_mcp_server():
     ]:
         _logger = logging.getLogger(logger_name)
         _logger.handlers = []
-        _logger.addHandler(file_handler)
+        _logger.addHandler(queue_handler)
         _logger.setLevel(log_level)
         _logger.propagate = False
 
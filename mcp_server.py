@@ -11,7 +11,9 @@ BrowserUse を使用する MCP サーバーの実装
     - 必要な環境変数が設定されていること (OPENAI_API_KEY など)
 """
 
+import asyncio
 import base64
+import contextlib
 import json
 import os
 import sys
@@ -23,10 +25,10 @@ from logging_config import logger
 os.environ["ANONYMIZED_TELEMETRY"] = "false"
 
 import fastmcp
-from dotenv import load_dotenv
 from pydantic import Field
 
 from browser_bot import (
+    CHROME_DEBUG_URL,
     get_accessibility_snapshot,
     get_current_url,
     get_full_screenshot,
@@ -37,17 +39,54 @@ from browser_bot import (
     run_lighthouse,
     run_script,
     run_task,
+    save_response_body,
+    shutdown,
     super_reload,
+    use_uvloop_if_available,
 )
 
-# .envファイルから環境変数を読み込む
-load_dotenv()
+# エージェントの実行は同じ Chrome のタブを操作するので、同時に 1 つだけにする
+# (並行して動かすとお互いの操作を邪魔し合う。タイムアウトは run_task が
+# max_steps に応じて設定する)
+_agent_semaphore = asyncio.Semaphore(1)
+
+
+def _dump_json(data) -> str:
+    """
+    ツールの結果を JSON 文字列にする
+
+    受け取るのは LLM なので、インデントせずに詰めて出力する
+    (大きなページソースなどで無駄な空白を送らないため)。
+    dict のまま返すと fastmcp がテキストと structuredContent の
+    両方に同じ内容を載せてしまうので、文字列で返す
+
+    Args:
+        data: JSON にするデータ
+
+    Returns:
+        str: JSON 文字列
+
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+# ファイルに保存するツール (ソース・スクリーンショット) が返す項目
+_FILE_RESULT_KEYS = ("file_path", "url", "title")
+
+
+@contextlib.asynccontextmanager
+async def _lifespan(_server):
+    """サーバー終了時に、ツール呼び出し間で使い回したブラウザ接続などを解放する"""
+    try:
+        yield
+    finally:
+        await shutdown()
+
 
-# Chrome 接続先の設定 (デフォルト: http://localhost:9222)
-CHROME_DEBUG_URL = os.getenv("CHROME_DEBUG_URL", "http://localhost:9222")
 # MCPサーバーの設定
 server = fastmcp.FastMCP(
     name="browser_bot",
+    lifespan=_lifespan,
     instructions=r"""ブラウザ操作のための MCP サーバーです。
 
 このサーバーは browser_use を使用して、ローカルで起動している Chrome (:9222) に接続します。
@@ -219,19 +258,23 @@ async def browser_use_local_chrome(
     ] = None,
 ) -> str:
     """ブラウザ操作タスクを実行する"""
-    if not task_text or not task_text.strip():
+    if not task_text or task_text.isspace():
         error_msg = "❌ エラー: タスクの説明が空です。実行したい操作を指定してください。"
         logger.error(error_msg)
         return error_msg
 
     logger.info(
-        f"MCP ツール実行開始 (max_steps={max_steps}, url={url}): {task_text[:100]}..."
+        "MCP ツール実行開始 (max_steps=%s, url=%s): %s...",
+        max_steps,
+        url,
+        task_text[:100],
     )
 
     try:
-        result_text = await run_task(
-            task=task_text, max_steps=max_steps, url=url
-        )
+        async with _agent_semaphore:
+            result_text = await run_task(
+                task=task_text, max_steps=max_steps, url=url
+            )
         logger.info("MCP ツール実行完了: 成功")
         return str(result_text)
     except Exception as e:
@@ -250,7 +293,8 @@ async def browser_use_local_chrome(
 
 現在の URL とページタイトルも取得します。
 
-ソースコードはユーザーのホームディレクトリの Downloads フォルダに HTML 形式で保存します。
+ソースコードは保存先ディレクトリ (環境変数 BROWSER_BOT_DOWNLOADS_DIR、
+未設定ならホームディレクトリの Downloads フォルダ) に HTML 形式で保存します。
 保存したファイルパスを含むレスポンスを JSON 形式で返します。
 """,
 )
@@ -268,25 +312,21 @@ async def get_page_source_code(
     ] = None,
 ) -> str:
     """現在アクティブなタブまたは指定された URL のソースコードを取得する"""
-    logger.info(f"ソースコード取得ツール実行開始 (URL: {url})")
+    logger.info("ソースコード取得ツール実行開始 (URL: %s)", url)
 
     try:
         result = await get_page_source(url=url)
 
         if "error" in result:
-            logger.error(f"ソースコード取得エラー: {result['error']}")
+            logger.error("ソースコード取得エラー: %s", result["error"])
             return result["error"]
 
-        logger.info(f"ソースコード取得ツール実行完了: {result['url']}")
+        logger.info("ソースコード取得ツール実行完了: %s", result["url"])
 
         # JSON レスポンスを構築
-        response = {
-            "file_path": result["file_path"],
-            "url": result["url"],
-            "title": result["title"],
-        }
+        response = {key: result[key] for key in _FILE_RESULT_KEYS}
 
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _dump_json(response)
 
     except Exception as e:
         error_msg = f"❌ エラー: ソースコード取得中に予期しないエラーが発生しました: {e!s}"
@@ -315,7 +355,7 @@ async def browser_snapshot_tool(
     ] = None,
 ) -> str:
     """A11y tree snapshot with ref IDs for interactive elements"""
-    logger.info(f"A11y スナップショットツール実行開始 (URL: {url})")
+    logger.info("A11y スナップショットツール実行開始 (URL: %s)", url)
 
     try:
         result = await get_accessibility_snapshot(url=url)
@@ -327,7 +367,7 @@ async def browser_snapshot_tool(
             result["snapshot_text"],
         ]
 
-        logger.info(f"A11y スナップショットツール完了: {result['url']}")
+        logger.info("A11y スナップショットツール完了: %s", result["url"])
         return "\n".join(response_parts)
 
     except Exception as e:
@@ -344,8 +384,11 @@ async def browser_snapshot_tool(
     name="get_visible_screenshot",
     description="""Browser_bot (Chrome) の現在アクティブなタブまたは
 指定された URL の表示されている箇所のスクリーンショットを取得し、
-ユーザーのホームディレクトリの Downloads フォルダに PNG 形式で保存します。
-保存したファイルパスを含むレスポンスJSON 形式でを返します。
+保存先ディレクトリ (環境変数 BROWSER_BOT_DOWNLOADS_DIR、
+未設定ならホームディレクトリの Downloads フォルダ) に保存します。
+形式は PNG (環境変数 BROWSER_BOT_SCREENSHOT_FORMAT=jpeg の場合は JPEG) で、
+ファイルパスの拡張子 (.png / .jpg) で判別できます。
+保存したファイルパスを含むレスポンスを JSON 形式で返します。
 """,
 )
 async def get_visible_screenshot_tool(
@@ -393,8 +436,10 @@ async def get_visible_screenshot_tool(
 ) -> str:
     """現在表示されている箇所または指定された URL のスクリーンショットを取得する。JSON を返します。"""
     logger.info(
-        f"表示箇所のスクリーンショット取得ツール実行開始 "
-        f"(URL: {url}, スクロール倍率: {page_y_offset_as_viewport_height})"
+        "表示箇所のスクリーンショット取得ツール実行開始 "
+        "(URL: %s, スクロール倍率: %s)",
+        url,
+        page_y_offset_as_viewport_height,
     )
 
     try:
@@ -405,19 +450,15 @@ async def get_visible_screenshot_tool(
         )
 
         if "error" in result:
-            logger.error(f"スクリーンショット取得エラー: {result['error']}")
+            logger.error("スクリーンショット取得エラー: %s", result["error"])
             return result["error"]
 
         logger.info(
-            f"表示箇所のスクリーンショット取得ツール実行完了: {result['url']}"
+            "表示箇所のスクリーンショット取得ツール実行完了: %s", result["url"]
         )
 
         # JSON レスポンスを構築
-        response = {
-            "file_path": result["file_path"],
-            "url": result["url"],
-            "title": result["title"],
-        }
+        response = {key: result[key] for key in _FILE_RESULT_KEYS}
 
         # include_image_binary が True の場合は画像バイナリを base64 エンコードして含める
         # if include_image_binary:
@@ -425,7 +466,7 @@ async def get_visible_screenshot_tool(
         #         result['screenshot']
         #     ).decode('utf-8')
 
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _dump_json(response)
 
     except Exception as e:
         error_msg = f"❌ エラー: スクリーンショット取得中に予期しないエラーが発生しました: {e!s}"
@@ -437,8 +478,12 @@ async def get_visible_screenshot_tool(
 @server.tool(
     name="get_full_screenshot",
     description="""Browser_bot (Chrome) の現在アクティブなタブまたは指定された URL
-の全領域をスクリーンショットを、ユーザーのホームディレクトリの Downloads フォルダに PNG 形式で保存します。
-保存したファイルパスを含むレスポンスJSON 形式でを返します。
+の全領域のスクリーンショットを取得し、保存先ディレクトリ
+(環境変数 BROWSER_BOT_DOWNLOADS_DIR、未設定ならホームディレクトリの
+Downloads フォルダ) に保存します。
+形式は PNG (環境変数 BROWSER_BOT_SCREENSHOT_FORMAT=jpeg の場合は JPEG) で、
+ファイルパスの拡張子 (.png / .jpg) で判別できます。
+保存したファイルパスを含むレスポンスを JSON 形式で返します。
 """,
 )
 async def get_full_screenshot_tool(
@@ -456,25 +501,21 @@ async def get_full_screenshot_tool(
     ] = None,
 ) -> str:
     """ページ全体または指定された URL のスクリーンショットを取得する"""
-    logger.info(f"全領域のスクリーンショット取得ツール実行開始 (URL: {url})")
+    logger.info("全領域のスクリーンショット取得ツール実行開始 (URL: %s)", url)
 
     try:
         result = await get_full_screenshot(url=url, include_image_binary=False)
 
         if "error" in result:
-            logger.error(f"スクリーンショット取得エラー: {result['error']}")
+            logger.error("スクリーンショット取得エラー: %s", result["error"])
             return result["error"]
 
         logger.info(
-            f"全領域のスクリーンショット取得ツール実行完了: {result['url']}"
+            "全領域のスクリーンショット取得ツール実行完了: %s", result["url"]
         )
 
         # JSON レスポンスを構築
-        response = {
-            "file_path": result["file_path"],
-            "url": result["url"],
-            "title": result["title"],
-        }
+        response = {key: result[key] for key in _FILE_RESULT_KEYS}
 
         # include_image_binary が True の場合は画像バイナリを base64 エンコードして含める
         # if include_image_binary:
@@ -482,7 +523,7 @@ async def get_full_screenshot_tool(
         #         result['screenshot']
         #     ).decode('utf-8')
 
-        return json.dumps(response, ensure_ascii=False, indent=2)
+        return _dump_json(response)
 
     except Exception as e:
         error_msg = f"❌ エラー: スクリーンショット取得中に予期しないエラーが発生しました: {e!s}"
@@ -578,18 +619,14 @@ async def run_javascript_in_browser(
     ] = None,
 ) -> str:
     """指定された JavaScript をブラウザで実行する"""
-    logger.info(f"JavaScript 実行ツール開始 (URL: {url})")
+    logger.info("JavaScript 実行ツール開始 (URL: %s)", url)
 
     try:
         result = await run_script(script=script, url=url)
 
         success_msg = "✅ JavaScript の実行が完了しました"
-        logger.info(f"{success_msg}: {result=}")
-        return json.dumps(
-            {"message": success_msg, "result": result},
-            ensure_ascii=False,
-            indent=2,
-        )
+        logger.info("%s: result=%r", success_msg, result)
+        return _dump_json({"message": success_msg, "result": result})
 
     except Exception as e:
         error_msg = f"❌ エラー: JavaScript 実行中にエラーが発生しました: {e.__class__} {e}"
@@ -615,7 +652,7 @@ async def get_current_url_tool() -> str:
         result = await get_current_url()
 
         if "error" in result:
-            logger.error(f"URL 取得エラー: {result['error']}")
+            logger.error("URL 取得エラー: %s", result["error"])
             return result["error"]
 
         # 結果を整形して返す
@@ -630,7 +667,7 @@ async def get_current_url_tool() -> str:
 {result["title"]}
 """
 
-        logger.info(f"現在の URL 取得ツール実行完了: {result['url']}")
+        logger.info("現在の URL 取得ツール実行完了: %s", result["url"])
         return response
 
     except Exception as e:
@@ -671,13 +708,13 @@ async def super_reload_tool(
     ] = "cdp",
 ) -> str:
     """現在アクティブなタブまたは指定された URL でスーパーリロードを実行する"""
-    logger.info(f"スーパーリロードツール実行開始 (URL: {url})")
+    logger.info("スーパーリロードツール実行開始 (URL: %s)", url)
 
     try:
         result = await super_reload(url=url, mode=mode)
 
         if "error" in result:
-            logger.error(f"スーパーリロードエラー: {result['error']}")
+            logger.error("スーパーリロードエラー: %s", result["error"])
             return result["error"]
 
         # 結果を整形して返す
@@ -694,7 +731,7 @@ async def super_reload_tool(
 ✅ キャッシュを無視してページを再読み込みしました。
 """
 
-        logger.info(f"スーパーリロードツール実行完了: {result['url']}")
+        logger.info("スーパーリロードツール実行完了: %s", result["url"])
         return response
 
     except Exception as e:
@@ -725,18 +762,20 @@ async def launch_chrome_with_debug(
 ) -> str:
     """Chrome をデバッグポートで起動する（リモートブラウザ使用時はスキップ）"""
     logger.info(
-        f"Chrome 起動ツール実行開始 "
-        f"(guest={as_guest}, URL: {CHROME_DEBUG_URL})"
+        "Chrome 起動ツール実行開始 (guest=%s, URL: %s)",
+        as_guest,
+        CHROME_DEBUG_URL,
     )
 
-    result = await launch_chrome(as_guest=as_guest)
+    # 続けて呼ばれるツールのために、起動後すぐに CDP 接続を始めておく
+    result = await launch_chrome(as_guest=as_guest, connect=True)
 
     status = result["status"]
     message = result["message"]
     browser_info = result.get("browser_info")
 
     if status == "error":
-        logger.error(f"Chrome 起動エラー: {message}")
+        logger.error("Chrome 起動エラー: %s", message)
         return f"❌ エラー: {message}"
 
     parts = [f"✅ {message}"]
@@ -749,6 +788,10 @@ async def launch_chrome_with_debug(
     return response
 
 
+# http_request でこのサイズを超えるバイナリ本文はファイルに保存して返す
+_HTTP_INLINE_BINARY_MAX_BYTES = 256_000
+
+
 @server.tool(
     name="http_request",
     description="""Browser_bot (Chrome) の現在アクティブなタブまたは指定された URL で
@@ -761,6 +804,7 @@ async def launch_chrome_with_debug(
     "status": HTTPステータスコード,
     "headers": レスポンスヘッダー,
     "body": レスポンス本文。バイナリデータなら base64 エンコードして返す,
+    "body_file": 大きなバイナリ本文の保存先パス (この場合 "body" は含まない),
 }
 ```
 
@@ -819,7 +863,7 @@ async def http_request_tool(
     ] = None,
 ) -> str:
     """Browser_bot のブラウザセッションを使って HTTP リクエストを送信する"""
-    logger.info(f"HTTP リクエストツール実行開始: {method.upper()} {url}")
+    logger.info("HTTP リクエストツール実行開始: %s %s", method.upper(), url)
     try:
         # kwargs を構築
         kwargs = {}
@@ -836,26 +880,32 @@ async def http_request_tool(
         response_body = response_data["body"]
         content_type = response_data["headers"].get("content-type", "")
 
-        # レスポンスが文字列っぽければデコードを試みる
-        # そうでなければ、バイナリデータなので base64 エンコードして返す
-        if "text" in content_type or "json" in content_type:
-            response_text = response_body.decode("utf-8", errors="replace")
-        else:
-            response_text = base64.b64encode(response_body).decode("utf-8")
-
         result = {
             "status": response_data["status"],
             "headers": response_data["headers"],
-            "body": response_text,
         }
 
+        # レスポンスが文字列っぽければデコードを試みる
+        # そうでなければ、バイナリデータなので base64 エンコードして返す。
+        # 大きなバイナリは base64 で膨らませずにファイルへ保存してパスを返す
+        if "text" in content_type or "json" in content_type:
+            result["body"] = response_body.decode("utf-8", errors="replace")
+        elif len(response_body) > _HTTP_INLINE_BINARY_MAX_BYTES:
+            result["body_file"] = await save_response_body(
+                response_body, content_type=content_type
+            )
+        else:
+            result["body"] = base64.b64encode(response_body).decode("utf-8")
+
         logger.info(
-            f"HTTP リクエストツール実行完了: {method.upper()} {url} -> "
-            f"{response_data['status']}"
+            "HTTP リクエストツール実行完了: %s %s -> %s",
+            method.upper(),
+            url,
+            response_data["status"],
         )
 
         # JSON として結果を返す
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return _dump_json(result)
 
     except Exception as e:
         error_msg = (
@@ -957,7 +1007,7 @@ async def lighthouse_audit_tool(
     Lighthouse を実行してパフォーマンス監査を行う
     """
     logger.info(
-        f"Lighthouse 監査ツール実行開始: url={url}, categories={categories}"
+        "Lighthouse 監査ツール実行開始: url=%s, categories=%s", url, categories
     )
 
     try:
@@ -969,10 +1019,12 @@ async def lighthouse_audit_tool(
         )
 
         logger.info(
-            f"Lighthouse 監査完了: {result['url']}, scores={result['scores']}"
+            "Lighthouse 監査完了: %s, scores=%s",
+            result["url"],
+            result["scores"],
         )
 
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return _dump_json(result)
 
     except Exception as e:
         error_msg = (
@@ -983,15 +1035,20 @@ async def lighthouse_audit_tool(
         return error_msg
 
 
+# サーバー起動に必要な環境変数
+_REQUIRED_ENV_VARS = ("OPENAI_API_KEY",)
+
+
 def main() -> None:
     """
     メイン関数: MCPサーバーを起動します
     """
     logger.info("MCP サーバー起動中...")
 
-    # 必要な環境変数のチェック
-    required_env_vars = ["OPENAI_API_KEY"]
-    missing_vars = [var for var in required_env_vars if not os.getenv(var)]
+    # 必要な環境変数のチェック (空文字列も未設定として扱う)
+    missing_vars = [
+        var for var in _REQUIRED_ENV_VARS if not os.environ.get(var)
+    ]
 
     if missing_vars:
         error_msg = f"❌ エラー: 必要な環境変数が設定されていません: {', '.join(missing_vars)}"
@@ -999,6 +1056,10 @@ def main() -> None:
         print(error_msg, file=sys.stderr)
         sys.exit(1)
 
+    # server.run() は anyio.run() でループを作り loop_factory を渡せないので、
+    # ここだけはイベントループポリシーで uvloop に切り替える
+    use_uvloop_if_available()
+
     try:
         # サーバーを起動 (stdio モード)
         logger.info("MCP サーバー起動完了")
@@ -1007,7 +1068,10 @@ def main() -> None:
         logger.info("MCP サーバーを終了します (KeyboardInterrupt)")
     except Exception as e:
         logger.error(
-            f"MCP サーバーエラー: {e.__class__.__name__}: {e}", exc_info=True
+            "MCP サーバーエラー: %s: %s",
+            e.__class__.__name__,
+            e,
+            exc_info=True,
         )
         raise
 
@@ -1,10 +1,46 @@
 """Selenium Grid との接続を管理するモジュール。"""
 
+import asyncio
+import atexit
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 
 from logging_config import logger
 
+# Selenium Grid の URL ごとに作成済みの (WebDriver, CDP URL)
+# (セッションの作成は数秒かかるので、CDP 接続を張り直すときは使い回す)
+_grid_sessions = {}
+
+
+def _is_session_alive(driver) -> bool:
+    """
+    WebDriver セッションがまだ使えるかを確認する
+
+    Args:
+        driver: WebDriver インスタンス
+
+    Returns:
+        bool: セッションが生きていれば True
+
+    """
+    try:
+        driver.current_url  # noqa: B018
+    except Exception:
+        return False
+    return True
+
+
+@atexit.register
+def _quit_grid_sessions():
+    """プロセス終了時に、作成した WebDriver セッションを閉じる"""
+    for driver, _cdp_ws_url in _grid_sessions.values():
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"WebDriver セッションの終了に失敗しました: {e}")
+    _grid_sessions.clear()
+
 
 async def get_cdp_url_from_selenium_grid(selenium_grid_url: str) -> str:
     """
@@ -13,6 +49,7 @@ async def get_cdp_url_from_selenium_grid(selenium_grid_url: str) -> str:
     Selenium Grid は WebDriver プロトコルを使用するが、browser_use は CDP を期待する。
     この関数は Selenium Grid から WebDriver セッションを作成し、
     se:cdp capability から CDP エンドポイントを取得することで、この差異を埋める。
+    作成したセッションは、生きている間は使い回す。
 
     Args:
         selenium_grid_url: Selenium Grid の URL
@@ -27,7 +64,18 @@ async def get_cdp_url_from_selenium_grid(selenium_grid_url: str) -> str:
     """
     logger.info(f"Selenium Grid から CDP URL を取得中: {selenium_grid_url}")
 
-    driver = None
+    cached = _grid_sessions.pop(selenium_grid_url, None)
+    if cached is not None:
+        driver, cdp_ws_url = cached
+        # WebDriver は同期 API なので、イベントループを止めないよう
+        # 他のスレッドで呼び出す
+        if await asyncio.to_thread(_is_session_alive, driver):
+            logger.info(
+                f"既存の WebDriver セッションを使い回します: {cdp_ws_url}"
+            )
+            _grid_sessions[selenium_grid_url] = cached
+            return cdp_ws_url
+        logger.info("既存の WebDriver セッションは終了しています")
 
     # Chrome オプションを設定
     chrome_options = Options()
@@ -45,8 +93,10 @@ async def get_cdp_url_from_selenium_grid(selenium_grid_url: str) -> str:
 
     # Selenium Grid に接続して WebDriver セッションを作成
     logger.info(f"WebDriver セッションを作成中: {selenium_grid_url}")
-    driver = webdriver.Remote(
-        command_executor=selenium_grid_url, options=chrome_options
+    driver = await asyncio.to_thread(
+        webdriver.Remote,
+        command_executor=selenium_grid_url,
+        options=chrome_options,
     )
 
     # セッション ID を取得
@@ -61,6 +111,7 @@ async def get_cdp_url_from_selenium_grid(selenium_grid_url: str) -> str:
     # 存在しない場合、
     cdp_ws_url = capabilities["se:cdp"]
     logger.info(f"se:cdp capability から CDP URL を取得: {cdp_ws_url}")
+    _grid_sessions[selenium_grid_url] = (driver, cdp_ws_url)
     return cdp_ws_url
 
     # # se:cdpVersion が存在する場合の代替方法